@@ -1,37 +1,5 @@
 import streamlit as st
-import base64
-
-
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-
-    css = f"""
-    <style>
-    .stApp {{
-        background: url("data:image/jpg;base64,{encoded}") no-repeat center center fixed;
-        background-size: cover;
-        position: relative;
-    }}
-
-    .stApp::before {{
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        height: 100%;
-        width: 100%;
-        background: rgba(255, 255, 255, 0.75); /* White overlay with 75% opacity */
-        z-index: 0;
-    }}
-
-    .stApp > * {{
-        position: relative;
-        z-index: 1;
-    }}
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
+from theme import add_bg_from_local
 
 # 🔁 Add background image
 add_bg_from_local("assests/beans.jpg")
@@ -0,0 +1,73 @@
+"""
+A quarter of Single Origin reports for an area (STORES x WEEKS synthetic
+PDFs, 23 x 13 = 299 by default) parsed as one batch across the process
+pool, then joined into the staff x week matrices. Staff move between
+stores and their names are spelled inconsistently, as in real exports.
+
+    python benchmarks/bench_compare.py
+    python benchmarks/bench_compare.py --stores 10 --weeks 4 --workers 1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import STAFF, SURNAMES, single_origin_report_pdf
+from waste_report.compare import compare_staff
+from waste_report.parser import default_workers, get_executor, parse_single_origin_report
+
+
+def quarter_of_reports(stores, weeks, staff_per_store, seed=0):
+    rng = random.Random(seed)
+    people = [f"{first} {last}" for first in STAFF for last in SURNAMES]
+    first_week = date(2025, 8, 4)
+    pdfs = []
+    for store in range(stores):
+        roster = rng.sample(people, min(staff_per_store + 4, len(people)))
+        for week in range(weeks):
+            names = [
+                name.upper() if rng.random() < 0.1 else name
+                for name in rng.sample(roster, min(staff_per_store, len(roster)))
+            ]
+            pdfs.append(single_origin_report_pdf(
+                pages=2, rows_per_page=(len(names) + 1) // 2, store_name=f"Store {store:02d}",
+                seed=store * 1000 + week, week_ending=(first_week + timedelta(weeks=week)).strftime("%d %b %Y"),
+                staff=names,
+            ))
+    return pdfs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=23)
+    parser.add_argument("--weeks", type=int, default=13)
+    parser.add_argument("--staff", type=int, default=20, help="staff on each report")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pdfs = quarter_of_reports(args.stores, args.weeks, args.staff)
+    print(f"generated {len(pdfs)} reports in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        reports = list(get_executor(args.workers).map(parse_single_origin_report, pdfs, chunksize=4))
+    else:
+        reports = [parse_single_origin_report(data) for data in pdfs]
+    parse_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    comparison = compare_staff(reports)
+    compare_s = time.perf_counter() - start
+
+    print(f"parse   {parse_s:8.2f} s  ({len(pdfs) / parse_s:.1f} reports/s, {args.workers} worker(s))")
+    print(f"compare {compare_s:8.3f} s  ({sum(len(r.df) for r in reports)} staff rows -> "
+          f"{comparison.mix.shape[0]} staff x {comparison.mix.shape[1]} weeks)")
+
+
+if __name__ == "__main__":
+    main()
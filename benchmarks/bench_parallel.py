@@ -0,0 +1,43 @@
+"""
+Scaling of parse_waste_report across worker counts on a synthetic report.
+
+    python benchmarks/bench_parallel.py --pages 40 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waste_report.parser import parse_waste_report
+from synthetic import waste_report_pdf
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    data = waste_report_pdf(pages=args.pages)
+    print(f"{args.pages} pages, {len(data) / 1024:.0f} KiB")
+    print(f"{'workers':>8}{'best s':>10}{'speed-up':>10}")
+
+    baseline = None
+    for workers in args.workers:
+        if workers > 1:
+            # Warm the pool so start-up is not charged to the first timing
+            parse_waste_report(data, workers=workers)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parse_waste_report(data, workers=workers)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"{workers:>8}{best:>10.2f}{baseline / best:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
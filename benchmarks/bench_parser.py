@@ -0,0 +1,98 @@
+"""
+Before/after timing for the waste report parser.
+
+    python benchmarks/bench_parser.py report.pdf [report2.pdf ...] [--repeat 3]
+
+"before" is the original page-script loop (text on every page, tables
+extracted twice on page 0, per-cell regex row checks, no page release);
+"after" is waste_report.parser.parse_waste_report in this process
+(workers=1), so both sides are single-pass timings tracemalloc can see.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+from functools import partial
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber
+
+from waste_report.parser import parse_waste_report
+
+
+# --- Original per-row helpers, kept here for comparison ---
+def is_all_caps(text):
+    return text.isupper()
+
+def is_numeric_row(row):
+    return all(re.fullmatch(r'[\d,.]*', str(cell).strip()) for cell in row if cell)
+
+def is_valid_text(text):
+    return bool(re.search(r'[a-zA-Z]', text)) and not is_all_caps(text)
+
+
+def parse_legacy(pdf_bytes):
+    clean_rows = []
+    store_name = raw_date = None
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        for page_num, page in enumerate(pdf.pages):
+            text = page.extract_text()
+            if page_num == 0 and text:
+                store_match = re.search(r"Store Name:\s*(.*)", text)
+                if store_match:
+                    store_name = store_match.group(1).strip()
+                for table in page.extract_tables():
+                    for i, row in enumerate(table):
+                        if i == 0 and "Last 4 Weeks" in row:
+                            raw_date = [date for date in row if date]
+            for table in page.extract_tables():
+                for row in table:
+                    if not row or not row[0]:
+                        continue
+                    first_cell = str(row[0]).strip()
+                    if is_all_caps(first_cell) or is_numeric_row(row):
+                        continue
+                    if is_valid_text(first_cell):
+                        clean_rows.append(row)
+    return clean_rows, store_name, raw_date
+
+
+def measure(fn, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'file':<32}{'pages':>6}{'before s':>10}{'after s':>10}{'before MiB':>12}{'after MiB':>11}")
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            data = f.read()
+        with pdfplumber.open(BytesIO(data)) as pdf:
+            pages = len(pdf.pages)
+        before_t, before_m = measure(parse_legacy, data, args.repeat)
+        after_t, after_m = measure(partial(parse_waste_report, workers=1), data, args.repeat)
+        print(
+            f"{os.path.basename(path):<32}{pages:>6}{before_t:>10.3f}{after_t:>10.3f}"
+            f"{before_m / 2**20:>12.1f}{after_m / 2**20:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+The many-store waste PDF: one pyplot figure per chart with tight_layout
+(the old path) against ReportWriter, which streams one A4 page per chart
+and its top-10 table from a single reused figure.
+
+    python benchmarks/bench_report_pdf.py
+    python benchmarks/bench_report_pdf.py --stores 50 --repeat 1 --out report.pdf
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+from bench_schema import synthetic_reports
+from waste_report.charts import waste_chart_specs, write_waste_report
+
+
+def waste_chart(top, title, ylabel, color):
+    """The old chart: a 9 x 5 pyplot figure of Waste_pct bars, fitted with tight_layout."""
+    fig, ax = plt.subplots(figsize=(9, 5))
+    bars = ax.barh(top["Item"], top["Waste_pct"], color=color, edgecolor="black")
+    for bar in bars:
+        ax.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2, f"{bar.get_width():.1f}%", va='center')
+    ax.set_xlabel("Waste %")
+    ax.set_ylabel(ylabel)
+    ax.invert_yaxis()
+    ax.grid(True, linestyle="--", alpha=0.5)
+    ax.set_title(title, fontsize=14)
+    fig.tight_layout()
+    return fig
+
+
+def per_figure(reports):
+    """The old render: a new figure for every chart, closed after it is saved."""
+    buffer = BytesIO()
+    pages = 0
+    with PdfPages(buffer) as pdf:
+        for report in reports:
+            for spec in waste_chart_specs(report):
+                fig = waste_chart(spec.top, spec.title, spec.ylabel, spec.color)
+                pdf.savefig(fig)
+                plt.close(fig)
+                pages += 1
+    return buffer.getvalue(), pages
+
+
+def streamed(reports):
+    buffer = BytesIO()
+    pages = write_waste_report(reports, buffer)
+    return buffer.getvalue(), pages
+
+
+def best_of(fn, reports, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdf, pages = fn(reports)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, pdf, pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=25)
+    parser.add_argument("--items", type=int, default=200, help="items on each store's report")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="also write the streamed PDF here")
+    args = parser.parse_args(argv)
+
+    reports = synthetic_reports(args.stores, 1, args.items)
+    results = {name: best_of(fn, reports, args.repeat) for name, fn in (("per-figure", per_figure), ("writer", streamed))}
+
+    print(f"{'path':<12}{'seconds':>9}{'KB':>8}{'pages':>7}")
+    for name, (seconds, pdf, pages) in results.items():
+        print(f"{name:<12}{seconds:>9.2f}{len(pdf) / 1024:>8.0f}{pages:>7}")
+    (old_s, old_pdf, _), (new_s, new_pdf, _) = results.values()
+    print(f"\n{old_s / new_s:.1f}x faster, {len(new_pdf) / len(old_pdf):.2f}x the size "
+          f"(the writer's pages also carry the tables), for {args.stores} stores")
+
+    if args.out:
+        with open(args.out, "wb") as f:
+            f.write(new_pdf)
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Row classification micro-benchmark: the original per-cell regex helpers
+against the column-wise waste_row_mask/build_waste_dataframe path, on
+synthetic table rows (no PDF involved). Also times taking the top 10 per
+category from the frame, with its tracemalloc peak.
+
+    python benchmarks/bench_rows.py --rows 100000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from bench_parser import is_all_caps, is_numeric_row, is_valid_text
+from synthetic import ITEMS
+from waste_report.charts import top_wasted
+from waste_report.parser import build_waste_dataframe, pastry_keywords
+
+
+def synthetic_rows(n, seed=0):
+    """Item rows mixed with section headers, totals and blank-led rows."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.05:
+            rows.append(["BAKERY"] + [None] * 10)
+        elif kind < 0.10:
+            rows.append([f"{rng.randint(1, 999):,}"] + [str(rng.randint(1, 999)) for _ in range(10)])
+        elif kind < 0.12:
+            rows.append([None] + [str(rng.randint(1, 60)) for _ in range(10)])
+        else:
+            rows.append([f"{rng.choice(ITEMS)}  {i}"] + [str(rng.randint(1, 60)) for _ in range(10)])
+    return rows
+
+
+def legacy_dataframe(raw_rows):
+    clean_rows = []
+    for row in raw_rows:
+        if not row or not row[0]:
+            continue
+        first_cell = str(row[0]).strip()
+        if is_all_caps(first_cell) or is_numeric_row(row):
+            continue
+        if is_valid_text(first_cell):
+            clean_rows.append(row)
+
+    df = pd.DataFrame(clean_rows)
+    df.columns = [f"col{i+1}" for i in range(len(df.columns))]
+    df["Item"] = df["col1"].str.replace(r"\s+", " ", regex=True).str.strip()
+    df["is_pastry"] = df["Item"].str.lower().str.contains(
+        "|".join([re.escape(name.lower()) for name in pastry_keywords])
+    )
+    df[["col10", "col11"]] = df[["col10", "col11"]].apply(pd.to_numeric, errors="coerce")
+    df = df.rename(columns={"col10": "Sold", "col11": "Waste"})
+    df = df[["Item", "is_pastry", "Sold", "Waste"]].dropna(subset=["Sold", "Waste"])
+    df["Waste_pct"] = (df["Waste"] / (df["Sold"] + df["Waste"]) * 100).round(2)
+    return df
+
+
+def best_of(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def frame_top10(rows):
+    return top_wasted(build_waste_dataframe(rows))
+
+
+def peak_kib(fn, rows):
+    tracemalloc.start()
+    fn(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rows = synthetic_rows(args.rows)
+    before, old_df = best_of(legacy_dataframe, rows, args.repeat)
+    after, new_df = best_of(build_waste_dataframe, rows, args.repeat)
+
+    same = old_df.reset_index(drop=True).equals(new_df[old_df.columns].reset_index(drop=True))
+    print(f"{args.rows} rows -> {len(new_df)} items (identical output: {same})")
+    print(f"per-row helpers: {before:.3f} s")
+    print(f"column-wise:     {after:.3f} s  ({before / after:.1f}x)")
+
+    frame_s, _ = best_of(frame_top10, rows, args.repeat)
+    print(f"\ntop 10 per category: {frame_s:.3f} s  peak {peak_kib(frame_top10, rows):,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Memory and aggregation speed of a year of reports for many stores: the
+per-report frames concatenated with a Store column (the old cross-store
+path) against the compact typed waste_frame().
+
+    python benchmarks/bench_schema.py --stores 25 --weeks 52 --items 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from bench_rows import synthetic_rows
+from waste_report.parser import WasteReport, build_waste_dataframe
+from waste_report.schema import memory_bytes, waste_frame
+
+
+def synthetic_reports(stores, weeks, items):
+    first = date(2025, 1, 5)
+    reports = []
+    for store in range(stores):
+        for week in range(weeks):
+            df = build_waste_dataframe(synthetic_rows(items, seed=store * weeks + week))
+            label = (first + timedelta(weeks=week)).strftime("%d/%m/%Y")
+            reports.append(WasteReport(df, f"Store {store}", [label, label]))
+    return reports
+
+
+def concatenated(reports):
+    frames = [
+        report.df.assign(Store=report.store_name, Week=report.date_range[0]) for report in reports
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate(df):
+    """Waste % per store and item over the year, plus the top 50 rows overall."""
+    totals = df.groupby(["Store", "Item"], observed=True)[["Sold", "Waste"]].sum()
+    totals["Waste_pct"] = totals["Waste"] / (totals["Sold"] + totals["Waste"]) * 100
+    return totals, df.nlargest(50, "Waste_pct")
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=25)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--items", type=int, default=200, help="raw table rows per report")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    reports = synthetic_reports(args.stores, args.weeks, args.items)
+    build_old, old = best_of(lambda: concatenated(reports), args.repeat)
+    build_new, new = best_of(lambda: waste_frame(reports), args.repeat)
+    agg_old, _ = best_of(lambda: aggregate(old), args.repeat)
+    agg_new, _ = best_of(lambda: aggregate(new), args.repeat)
+
+    print(f"{len(reports)} reports, {len(new):,} rows")
+    print(f"{'':24}{'MiB':>8}{'build s':>9}{'agg s':>8}")
+    print(f"{'per-report frames':24}{memory_bytes([r.df for r in reports]) / 2**20:>8.1f}")
+    print(f"{'concatenated':24}{memory_bytes(old) / 2**20:>8.1f}{build_old:>9.3f}{agg_old:>8.3f}")
+    print(f"{'waste_frame (typed)':24}{memory_bytes(new) / 2**20:>8.1f}{build_new:>9.3f}{agg_new:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
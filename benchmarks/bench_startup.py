@@ -0,0 +1,99 @@
+"""
+Cold-start cost of each Streamlit page before anything has been uploaded.
+Every page runs in a fresh interpreter under -X importtime, in Streamlit's
+bare mode (no server, uploaders return None), and the time to the end of
+its first run is reported alongside the import time of the heavy packages
+it pulled in.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["app.py", "pages/1_Waste_Report.py", "pages/2_Single_Origin.py", "pages/3_Trends.py"]
+HEAVY = ["pandas", "numpy", "matplotlib", "matplotlib.pyplot", "pdfplumber", "PIL"]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def run_child(page):
+    """Run one page script as its first rerun would, printing seconds to stdout."""
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    import runpy
+    import streamlit  # noqa: F401  (part of every page's start-up)
+    runpy.run_path(page, run_name="__page__")
+    print(json.dumps({"first_run_s": time.perf_counter() - start}))
+
+
+def parse_importtime(stderr):
+    """(total import ms, {heavy package: cumulative ms}) from -X importtime output."""
+    total_us, heavy = 0, {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if not indent:
+            total_us += int(cumulative)
+        if name in HEAVY and name not in heavy:
+            heavy[name] = int(cumulative) / 1000
+    return total_us / 1000, heavy
+
+
+def measure(page):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", page],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    process_s = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(f"{page} failed:\n{proc.stderr[-2000:]}")
+    first_run_s = json.loads(proc.stdout.strip().splitlines()[-1])["first_run_s"]
+    import_ms, heavy = parse_importtime(proc.stderr)
+    return process_s, first_run_s, import_ms, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per page; medians are reported")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return run_child(args.child)
+
+    results = []
+    print(f"{'page':<26}{'process s':>10}{'first run s':>12}{'imports ms':>11}  heavy imports (ms)")
+    for page in args.pages:
+        runs = [measure(page) for _ in range(args.repeat)]
+        heavy = runs[-1][3]
+        result = {
+            "page": page,
+            "process_s": round(statistics.median(r[0] for r in runs), 3),
+            "first_run_s": round(statistics.median(r[1] for r in runs), 3),
+            "import_ms": round(statistics.median(r[2] for r in runs), 1),
+            "heavy_imports_ms": {name: round(ms, 1) for name, ms in heavy.items()},
+        }
+        results.append(result)
+        print(f"{page:<26}{result['process_s']:>10.3f}{result['first_run_s']:>12.3f}{result['import_ms']:>11.1f}  "
+              + (", ".join(f"{name} {ms:.0f}" for name, ms in heavy.items()) or "none"))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
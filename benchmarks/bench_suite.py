@@ -0,0 +1,205 @@
+"""
+End-to-end benchmark of the report pipeline on synthetic PDFs. Each size
+is PAGESxITEMS; parse, aggregate, render and PDF assembly are timed
+separately (best of --repeat) and written as JSON, with the parser's own
+per-stage spans alongside. Charts go through ReportWriter, as in the app. Pass --compare to diff against an earlier run.
+
+    python benchmarks/bench_suite.py --sizes 1x10 10x250 50x2500 --out bench.json
+    python benchmarks/bench_suite.py --sizes 200x10000 --report waste --compare bench.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import MAX_ROWS_PER_PAGE, rows_per_page, single_origin_report_pdf, waste_report_pdf
+from waste_report import profiling
+from waste_report.charts import (
+    ReportWriter, cross_store_ranking, draw_single_origin_page, top_wasted, write_waste_report,
+)
+from waste_report.parser import parse_single_origin_report, parse_waste_report
+
+STAGES = ["parse_s", "aggregate_s", "render_s", "assemble_s"]
+
+
+def parse_size(text):
+    pages, items = (int(part) for part in text.lower().split("x"))
+    if not 1 <= pages <= 200 or not 10 <= items <= 10_000:
+        raise argparse.ArgumentTypeError("sizes must be 1-200 pages x 10-10000 items")
+    if rows_per_page(items, pages) > MAX_ROWS_PER_PAGE:
+        raise argparse.ArgumentTypeError(
+            f"{text}: synthetic pages hold at most {MAX_ROWS_PER_PAGE} items; use more pages"
+        )
+    return pages, items
+
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def profiled_parse(parse):
+    """Parse once more with profiling on, for the per-stage breakdown."""
+    profiling.enable(True)
+    run = profiling.start_run("parse")
+    try:
+        parse()
+    finally:
+        profiling.finish_run(run, log=False)
+        profiling.enable(False)
+    return run.summary()
+
+
+def parsed(report, pages, items):
+    """report, or an error if it has no rows: the timings of an empty parse mean nothing."""
+    if report.df.empty:
+        raise RuntimeError(f"{pages}x{items}: the synthetic report parsed to no rows")
+    return report
+
+
+def render_and_assemble(write, repeat):
+    """
+    Time write(buffer), which streams a report through ReportWriter, split
+    into its chart.render and pdf.assemble spans; returns (render_s,
+    assemble_s, pdf_kb) with the best of each stage across repeats.
+    """
+    best_render = best_assemble = float("inf")
+    profiling.enable(True)
+    try:
+        for _ in range(repeat):
+            buffer = BytesIO()
+            run = profiling.start_run("render")
+            try:
+                write(buffer)
+            finally:
+                profiling.finish_run(run, log=False)
+            stages = {row["stage"]: row["wall_ms"] / 1000 for row in run.summary()}
+            best_render = min(best_render, stages.get("chart.render", 0.0))
+            best_assemble = min(best_assemble, stages.get("pdf.assemble", 0.0))
+    finally:
+        profiling.enable(False)
+    return best_render, best_assemble, len(buffer.getvalue()) / 1024
+
+
+def write_single_origin(buffer, df_sorted, store_name, date):
+    with ReportWriter(buffer, figsize=(9, 5)) as writer:
+        writer.add_page(draw_single_origin_page, ("single_origin", df_sorted, store_name, date))
+
+
+def bench_waste(pages, items, repeat, workers):
+    data = waste_report_pdf(pages, rows_per_page(items, pages))
+    parse = lambda: parse_waste_report(data, workers=workers)
+    parse_s, report = best_of(parse, repeat)
+    report = parsed(report, pages, items)
+
+    def aggregate():
+        top_wasted(report.df)
+        return cross_store_ranking([report])
+    aggregate_s, _ = best_of(aggregate, repeat)
+
+    render_s, assemble_s, out_kb = render_and_assemble(lambda buffer: write_waste_report([report], buffer), repeat)
+    return data, len(report.df), parse_s, aggregate_s, render_s, assemble_s, out_kb, profiled_parse(parse)
+
+
+def bench_single_origin(pages, items, repeat, workers):
+    data = single_origin_report_pdf(pages, rows_per_page(items, pages))
+    parse = lambda: parse_single_origin_report(data)
+    parse_s, report = best_of(parse, repeat)
+    report = parsed(report, pages, items)
+    aggregate_s, df_sorted = best_of(lambda: report.df.sort_values(by="Mix % Last", ascending=False), repeat)
+    render_s, assemble_s, out_kb = render_and_assemble(
+        lambda buffer: write_single_origin(buffer, df_sorted, report.store_name, report.date), repeat
+    )
+    return data, len(report.df), parse_s, aggregate_s, render_s, assemble_s, out_kb, profiled_parse(parse)
+
+
+BENCHMARKS = {"waste": bench_waste, "single-origin": bench_single_origin}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["report"], r["pages"], r["items"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (new / old, below 1.00 is faster)")
+    for result in results:
+        old = baseline.get((result["report"], result["pages"], result["items"]))
+        if old is None:
+            continue
+        ratios = "  ".join(
+            f"{stage[:-2]} {result[stage] / old[stage]:.2f}" for stage in STAGES if old.get(stage)
+        )
+        print(f"{result['report']:>14} {result['pages']:>4}x{result['items']:<6} {ratios}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(1, 10), (10, 250), (50, 2500)],
+                        help=f"PAGESxITEMS, 1-200 pages and 10-10000 items, at most {MAX_ROWS_PER_PAGE} items per page")
+    parser.add_argument("--report", choices=[*BENCHMARKS, "all"], default="all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="parse workers for waste reports")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    args = parser.parse_args(argv)
+
+    kinds = list(BENCHMARKS) if args.report == "all" else [args.report]
+    results = []
+    print(f"{'report':>14} {'size':<11}{'rows':>6}{'parse s':>9}{'agg s':>8}{'render s':>9}{'pdf s':>8}")
+    for kind in kinds:
+        for pages, items in args.sizes:
+            data, rows, *timings, out_kb, parse_stages = BENCHMARKS[kind](pages, items, args.repeat, args.workers)
+            result = {
+                "report": kind,
+                "pages": pages,
+                "items": items,
+                "rows_parsed": rows,
+                "input_kb": round(len(data) / 1024, 1),
+                "input_sha256": hashlib.sha256(data).hexdigest(),
+                "output_pdf_kb": round(out_kb, 1),
+                **{stage: round(seconds, 4) for stage, seconds in zip(STAGES, timings)},
+                "parse_stages": parse_stages,
+            }
+            results.append(result)
+            print(f"{kind:>14} {f'{pages}x{items}':<11}{rows:>6}" + "".join(
+                f"{seconds:>{width}.3f}" for seconds, width in zip(timings, (9, 8, 9, 8))
+            ))
+
+    output = {
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
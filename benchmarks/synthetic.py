@@ -0,0 +1,134 @@
+"""
+Synthetic report PDFs laid out the way waste_report.parser expects, so the
+benchmarks have something realistic to chew on without shipping real
+store data.
+
+    python benchmarks/synthetic.py waste out.pdf --pages 30
+    python benchmarks/synthetic.py single-origin so.pdf --rows 40
+"""
+import argparse
+import math
+import random
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+ITEMS = [
+    "Almond Croissant", "Butter Croissant", "Pain Au Chocolat", "Cinnamon Swirl",
+    "Ham Cheese Toastie", "Tuna Melt", "Banana Bread", "Chicken Wrap",
+    "Egg Mayo Sandwich", "Falafel Salad", "Blueberry Muffin", "Porridge Pot",
+]
+WEEKS = ["03/11/2025", "27/10/2025", "20/10/2025", "13/10/2025"]
+STAFF = ["Alice", "Bob", "Carol", "Dan", "Erin", "Farah", "Gus", "Hana", "Ivan", "Jo"]
+SURNAMES = ["Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Johnson", "Davies"]
+
+# No CreationDate, so the same arguments always give byte-identical PDFs
+PDF_METADATA = {"CreationDate": None}
+
+# Rows share the fixed page height; past about 130 the ruled grid is too
+# tight for pdfplumber to find a table and the report parses to nothing
+MAX_ROWS_PER_PAGE = 100
+
+
+def _table_page(pdf, rows, header_text=None):
+    """Draw rows as a ruled grid so pdfplumber's line strategy finds a table."""
+    fig = plt.figure(figsize=(11.69, 8.27))
+    ncols = max(len(row) for row in rows)
+    top, row_h = 0.9, 0.8 / max(len(rows), 1)
+    left, col_w = 0.03, 0.94 / ncols
+    if header_text:
+        fig.text(left, 0.95, header_text, fontsize=9)
+    for i in range(len(rows) + 1):
+        y = top - i * row_h
+        fig.add_artist(plt.Line2D([left, left + ncols * col_w], [y, y], color="black", lw=0.5))
+    for j in range(ncols + 1):
+        x = left + j * col_w
+        fig.add_artist(plt.Line2D([x, x], [top, top - len(rows) * row_h], color="black", lw=0.5))
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            if cell is not None:
+                fig.text(left + j * col_w + 0.003, top - (i + 0.7) * row_h, str(cell), fontsize=5)
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def rows_per_page(items, pages):
+    """Rows per page needed to spread items over pages."""
+    return max(1, math.ceil(items / pages))
+
+
+def _check_rows_per_page(rows_per_page):
+    if rows_per_page > MAX_ROWS_PER_PAGE:
+        raise ValueError(f"At most {MAX_ROWS_PER_PAGE} rows per page parse back; use more pages")
+
+
+def waste_report_pdf(pages=3, rows_per_page=25, store_name="Synthetic Store", seed=0):
+    """Bytes of a "4 Weekly Food Sales by Store" PDF with the given size."""
+    _check_rows_per_page(rows_per_page)
+    rng = random.Random(seed)
+    buffer = BytesIO()
+    with PdfPages(buffer, metadata=PDF_METADATA) as pdf:
+        for page_num in range(pages):
+            rows = []
+            if page_num == 0:
+                rows.append([None] + WEEKS + [None] * 5 + ["Last 4 Weeks"])
+            rows.append(["BAKERY"] + [None] * 10)
+            for k in range(rows_per_page):
+                name = f"{rng.choice(ITEMS)} {page_num}-{k}"
+                rows.append([name] + [str(rng.randint(1, 60)) for _ in range(10)])
+            header = f"Store Name: {store_name}" if page_num == 0 else "4 Weekly Food Sales by Store"
+            _table_page(pdf, rows, header)
+    return buffer.getvalue()
+
+
+def single_origin_report_pdf(pages=1, rows_per_page=12, store_name="Synthetic Store", seed=0,
+                             week_ending="03 Nov 2025", staff=None):
+    """
+    Bytes of a "Single Origin Espresso Sales Report" PDF: the date on the
+    first text line, the store on the third table row and staff rows with
+    Previous Week and Mix % Last columns. Later pages continue the staff table.
+    staff names the rows (rows_per_page per page) instead of random unique
+    names, so the same people can appear in several weeks' reports.
+    """
+    _check_rows_per_page(rows_per_page)
+    rng = random.Random(seed)
+    buffer = BytesIO()
+    metadata = dict(PDF_METADATA, Title="Single Origin Espresso Sales Report")
+    with PdfPages(buffer, metadata=metadata) as pdf:
+        for page_num in range(pages):
+            rows = [["", "Name", "Total", "SO", "Previous Week", "Last Week", "Mix % Last"]]
+            if page_num == 0:
+                rows = [["Store", "", "", "", "", "", ""]] + rows + [["", store_name, "", "", "", "", ""]]
+            for k in range(rows_per_page):
+                index = page_num * rows_per_page + k
+                if staff is not None and index >= len(staff):
+                    break
+                name = staff[index] if staff is not None else f"{rng.choice(STAFF)} {rng.choice(SURNAMES)} {page_num}-{k}"
+                total = rng.randint(50, 400)
+                so = rng.randint(0, total // 3)
+                rows.append(["", name, str(total), str(so), f"{rng.uniform(0, 30):.1f}%", str(so), f"{so * 100 / total:.1f}%"])
+            header = f"Week ending {week_ending} x" if page_num == 0 else "Single Origin Espresso Sales Report"
+            _table_page(pdf, rows, header)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["waste", "single-origin"])
+    parser.add_argument("out")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--store", default="Synthetic Store")
+    args = parser.parse_args(argv)
+
+    make = waste_report_pdf if args.kind == "waste" else single_origin_report_pdf
+    data = make(args.pages, args.rows, args.store)
+    with open(args.out, "wb") as f:
+        f.write(data)
+
+
+if __name__ == "__main__":
+    main()
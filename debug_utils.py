@@ -0,0 +1,26 @@
+import streamlit as st
+from waste_report import profiling
+
+
+def show_timings(run, jobs=()):
+    """
+    Finish a profiled page run and show its per-stage timings in the
+    sidebar, followed by those of the background parse jobs behind the page.
+    """
+    run = profiling.finish_run(run)
+    if run is None:
+        return
+    import pandas as pd
+    with st.sidebar.expander(f"⏱️ Timings – {run.wall * 1000:.0f} ms", expanded=True):
+        st.dataframe(pd.DataFrame(run.summary()).set_index("stage"), use_container_width=True)
+        st.caption(
+            f"Script run: {run.wall * 1000:.0f} ms wall, {run.cpu * 1000:.0f} ms CPU. "
+            "Emails are timed separately in the log."
+        )
+        parses = [job.run for job in jobs if job.run is not None]
+        if parses:
+            spans = [span for parse in parses for span in parse.spans]
+            st.dataframe(pd.DataFrame(profiling.summarise(spans)).set_index("stage"), use_container_width=True)
+            st.caption(
+                f"Background parse of {len(parses)} upload(s): {sum(parse.wall for parse in parses) * 1000:.0f} ms wall."
+            )
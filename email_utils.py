@@ -1,9 +1,18 @@
+import csv
+import io
 import smtplib
 import ssl
 import os
 import re
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from email.message import EmailMessage
 import streamlit as st
+from waste_report.compat import tomllib
+from waste_report.profiling import profiled_run, span
 
 def validate_email(email):
     """Simple email validation using regex."""
@@ -20,43 +29,320 @@ def get_email_config():
             "sender_email": st.secrets["email"]["address"],
             "sender_password": st.secrets["email"]["password"],
             "smtp_server": st.secrets["email"].get("smtp_server", "smtp.gmail.com"),
-            "smtp_port": int(st.secrets["email"].get("smtp_port", 587))
+            "smtp_port": int(st.secrets["email"].get("smtp_port", 587)),
+            "starttls": bool(st.secrets["email"].get("starttls", True)),
+            "pool_size": int(st.secrets["email"].get("pool_size", 3)),
+            "rate_limit": float(st.secrets["email"].get("rate_limit", 0)),
         }
-    except (KeyError, AttributeError):
+    except (KeyError, AttributeError, FileNotFoundError):
         return {
             "sender_email": os.getenv("EMAIL_ADDRESS"),
             "sender_password": os.getenv("EMAIL_PASSWORD"),
             "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
-            "smtp_port": int(os.getenv("SMTP_PORT", 587))
+            "smtp_port": int(os.getenv("SMTP_PORT", 587)),
+            "starttls": os.getenv("SMTP_STARTTLS", "1") not in ("0", "false", "False"),
+            "pool_size": int(os.getenv("SMTP_POOL_SIZE", 3)),
+            "rate_limit": float(os.getenv("SMTP_RATE_LIMIT", 0)),
         }
 
-def send_email_with_reports(sender_email, sender_password, recipient_email, subject, body, pdf_paths, smtp_server="smtp.gmail.com", smtp_port=587):
+def build_message(sender_email, recipient_email, subject, body, attachments):
     """
-    Sends an email with the given PDF attachments to the recipient.
+    Build an email with in-memory PDF attachments, given as
+    (file_name, pdf_bytes) pairs.
     """
-    try:
-        msg = EmailMessage()
-        msg["From"] = sender_email
-        msg["To"] = recipient_email
-        msg["Subject"] = subject
-        msg.set_content(body)
-
-        for pdf_path in pdf_paths:
-            if not os.path.exists(pdf_path):
+    msg = EmailMessage()
+    msg["From"] = sender_email
+    msg["To"] = recipient_email
+    msg["Subject"] = subject
+    msg.set_content(body)
+    for file_name, file_data in attachments:
+        msg.add_attachment(file_data, maintype="application", subtype="pdf", filename=file_name)
+    return msg
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection that is kept open between messages
+    and reopened (with backoff) when the server drops it.
+    """
+
+    # Failures that retrying on a fresh connection will not fix
+    PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+    def __init__(self, sender_email, sender_password, smtp_server="smtp.gmail.com", smtp_port=587,
+                 starttls=True, timeout=30, retries=3, backoff=1.0):
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.starttls = starttls
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._server = None
+        self.attempts = 0
+
+    def connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls(context=ssl.create_default_context())
+            if self.sender_password:
+                server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def send(self, msg):
+        """Send one message, reconnecting on failure. Returns the number of attempts."""
+        for attempt in range(self.retries + 1):
+            self.attempts = attempt + 1
+            try:
+                if self._server is None:
+                    with span("email.connect"):
+                        self.connect()
+                with span("email.send"):
+                    self._server.send_message(msg)
+                return self.attempts
+            except self.PERMANENT_ERRORS:
+                self.close()
+                raise
+            except (smtplib.SMTPException, OSError):
+                self.close()
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EmailJob:
+    """Status of one queued message: queued, sending, sent or failed."""
+
+    def __init__(self, message, store=None):
+        self.job_id = uuid.uuid4().hex
+        self.message = message
+        self.recipient = message["To"]
+        self.store = store
+        self.status = "queued"
+        self.error = None
+        self.attempts = 0
+
+
+class EmailDispatcher:
+    """
+    Sends queued messages from background threads, one per SMTPSession in
+    the pool, so the Streamlit script never waits on the SMTP handshake
+    and a large batch is spread over a few persistent connections. An
+    optional rate_limit (messages per second) is shared by the whole pool.
+    A connection is closed after idle_timeout seconds without work.
+    """
+
+    def __init__(self, sessions, idle_timeout=60, max_jobs=1000, rate_limit=None):
+        self.sessions = sessions
+        self.idle_timeout = idle_timeout
+        self.max_jobs = max_jobs
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = {}
+
+    def submit(self, msg, store=None):
+        job = EmailJob(msg, store)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            for i, session in enumerate(self.sessions):
+                thread = self._threads.get(i)
+                if thread is None or not thread.is_alive():
+                    thread = threading.Thread(target=self._run, args=(session,), name=f"email-dispatcher-{i}", daemon=True)
+                    thread.start()
+                    self._threads[i] = thread
+        self._queue.put(job)
+        return job
+
+    def submit_many(self, messages):
+        """Queue (store, message) pairs; returns their jobs in the same order."""
+        return [self.submit(msg, store) for store, msg in messages]
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def join(self):
+        """Block until every queued message has been handled."""
+        self._queue.join()
+
+    def _run(self, session):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                session.close()
                 continue
-            with open(pdf_path, "rb") as f:
-                file_data = f.read()
-                file_name = os.path.basename(pdf_path)
-                msg.add_attachment(file_data, maintype="application", subtype="pdf", filename=file_name)
-
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-
-        return True
-
-    except Exception as e:
-        st.error(f"Email failed: {e}")
-        return False
+            job.status = "sending"
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.wait()
+                with profiled_run("email"):
+                    job.attempts = session.send(job.message)
+                job.status = "sent"
+            except Exception as e:
+                job.attempts = session.attempts
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                # Attachments are no longer needed once the job is done
+                job.message = None
+                self._queue.task_done()
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+def get_dispatcher(config):
+    """Process-wide dispatcher (and pool of SMTP connections) per sender account."""
+    key = (config["smtp_server"], config["smtp_port"], config["sender_email"])
+    with _dispatchers_lock:
+        if key not in _dispatchers:
+            # Sessions connect lazily, so a single email only ever opens one
+            sessions = [
+                SMTPSession(
+                    config["sender_email"], config["sender_password"], config["smtp_server"],
+                    config["smtp_port"], starttls=config.get("starttls", True),
+                )
+                for _ in range(max(1, config.get("pool_size", 1)))
+            ]
+            _dispatchers[key] = EmailDispatcher(sessions, rate_limit=config.get("rate_limit") or None)
+        return _dispatchers[key]
+
+def queue_email_with_reports(recipient_email, subject, body, attachments, config=None):
+    """
+    Queue an email with the given (file_name, pdf_bytes) attachments for
+    background delivery and return its EmailJob.
+    """
+    config = config or get_email_config()
+    msg = build_message(config["sender_email"], recipient_email, subject, body, attachments)
+    return get_dispatcher(config).submit(msg)
+
+def show_email_status(job_id, config=None):
+    """Render the delivery status of a previously queued email."""
+    config = config or get_email_config()
+    job = get_dispatcher(config).job(job_id)
+    if job is None:
+        return
+    if job.status == "sent":
+        st.success(f"📬 Report sent successfully to {job.recipient}!")
+    elif job.status == "failed":
+        st.error(f"Email to {job.recipient} failed: {job.error}")
+    else:
+        st.info(f"✉️ Sending report to {job.recipient}… ({job.status}). Interact with the page to refresh.")
+
+# --- Distribution lists ---
+def distribution_list_path():
+    return os.getenv("REPORT_DISTRIBUTION_LIST", "distribution.toml")
+
+def _store_key(store_name):
+    return " ".join((store_name or "").split()).casefold()
+
+def parse_distribution_list(data, file_name):
+    """
+    {store: [emails]} from a CSV with store and email columns (one row per
+    recipient, or several addresses separated by ';') or a TOML file with
+    a [stores] table of store = ["address", ...].
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    distribution = {}
+    if file_name.lower().endswith(".toml"):
+        parsed = tomllib.loads(text)
+        for store, emails in parsed.get("stores", {}).items():
+            distribution.setdefault(store, []).extend([emails] if isinstance(emails, str) else emails)
+    else:
+        for row in csv.DictReader(io.StringIO(text)):
+            row = {(key or "").strip().lower(): (value or "") for key, value in row.items()}
+            store = row.get("store", "").strip()
+            if store:
+                distribution.setdefault(store, []).extend(row.get("email", "").split(";"))
+    return {
+        store: list(dict.fromkeys(email.strip() for email in emails if email.strip()))
+        for store, emails in distribution.items()
+    }
+
+def load_distribution_list(path=None):
+    """The configured distribution list (REPORT_DISTRIBUTION_LIST), or {} if there is none."""
+    path = path or distribution_list_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return parse_distribution_list(f.read(), path)
+
+def recipients_for(distribution, store_name):
+    """Addresses listed for a store, matching names case- and whitespace-insensitively."""
+    key = _store_key(store_name)
+    return [email for store, emails in distribution.items() if _store_key(store) == key for email in emails]
+
+def send_to_distribution_list(distribution, attachments_by_store, subject, body_for, config=None):
+    """
+    Build one message per store recipient up front, each carrying that
+    store's attachments, and queue them all on the dispatcher pool.
+    Returns (jobs, invalid_addresses, stores_without_recipients).
+    """
+    config = config or get_email_config()
+    messages, invalid, missing = [], [], []
+    for store, attachments in attachments_by_store.items():
+        recipients = recipients_for(distribution, store)
+        if not recipients:
+            missing.append(store)
+        for recipient in recipients:
+            if not validate_email(recipient):
+                invalid.append((store, recipient))
+                continue
+            messages.append((store, build_message(config["sender_email"], recipient, subject, body_for(store), attachments)))
+    return get_dispatcher(config).submit_many(messages), invalid, missing
+
+def show_bulk_status(job_ids, config=None):
+    """Render progress and per-recipient delivery status of a distribution run."""
+    config = config or get_email_config()
+    dispatcher = get_dispatcher(config)
+    jobs = [job for job in map(dispatcher.job, job_ids) if job is not None]
+    if not jobs:
+        return
+    done = sum(job.status in ("sent", "failed") for job in jobs)
+    failed = sum(job.status == "failed" for job in jobs)
+    st.progress(done / len(jobs), text=f"{done}/{len(jobs)} emails processed, {failed} failed")
+    import pandas as pd
+    st.dataframe(
+        pd.DataFrame(
+            [(job.store, job.recipient, job.status, job.attempts, job.error or "") for job in jobs],
+            columns=["Store", "Recipient", "Status", "Attempts", "Error"],
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
@@ -1,59 +1,17 @@
 import streamlit as st
-import pdfplumber
-import pandas as pd
-import matplotlib.pyplot as plt
-import re
-from io import BytesIO
-from matplotlib.backends.backend_pdf import PdfPages
-import os
-import base64
-from email_utils import send_email_with_reports, validate_email, get_email_config
-# --- Helper functions ---
-def is_all_caps(text):
-    return text.isupper()
-
-def is_numeric_row(row):
-    return all(re.fullmatch(r'[\d,.]*', str(cell).strip()) for cell in row if cell)
-
-def is_valid_text(text):
-    return bool(re.search(r'[a-zA-Z]', text)) and not is_all_caps(text)
-
-# Known pastry products
-pastry_keywords = [
-    "Almond Croissant", "Apricot Croissant", "Vegan Raspberry Croissant",
-    "Pain Au Chocolat", "Pain Au Raisin", "Cinnamon Swirl", "Butter Croissant"
-]
-
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-
-    css = f"""
-    <style>
-    .stApp {{
-        background: url("data:image/jpg;base64,{encoded}") no-repeat center center fixed;
-        background-size: cover;
-        position: relative;
-    }}
-
-    .stApp::before {{
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        height: 100%;
-        width: 100%;
-        background: rgba(255, 255, 255, 0.75); /* White overlay with 75% opacity */
-        z-index: 0;
-    }}
-
-    .stApp > * {{
-        position: relative;
-        z-index: 1;
-    }}
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
+from theme import add_bg_from_local
+from debug_utils import show_timings
+import sqlite3
+import time
+from email_utils import (
+    load_distribution_list, parse_distribution_list, queue_email_with_reports, send_to_distribution_list,
+    show_bulk_status, show_email_status, validate_email,
+)
+from waste_report.cache import content_hash
+from waste_report.profiling import start_run
+
+# Timings are only collected with REPORT_PROFILE=1
+run = start_run("waste_report_page")
 
 # 🔁 Add background image
 add_bg_from_local("assests/report.jpg")
@@ -63,112 +21,79 @@ tab1, tab2 = st.tabs(["⬇️ Download Report", "📧 Email Report"])
 # --- Streamlit app ---
 st.title("📉 Weekly Waste Report Analyzer Tool")
 st.info("This feature will allow you to plot food waste percentages.")
-uploaded_file = st.file_uploader("Upload your PDF report - 4 Weekly Food Sales - (Colin)", type="pdf")
+uploaded_files = st.file_uploader(
+    "Upload your PDF report(s) - 4 Weekly Food Sales - (Colin)", type="pdf", accept_multiple_files=True
+)
+
+parse_jobs = []
+if uploaded_files:
+    # Imported once there is something to read: these pull in pandas, matplotlib and pdfplumber
+    from waste_report.charts import TOP_N, cross_store_ranking, render_waste_report
+    from waste_report.history import record_waste_report
+    from waste_report.jobs import get_job_queue
 
-if uploaded_file:
     try:
-        clean_rows = []
-        first_date = last_date = store_name = None
-        parsed_dates = []
-        raw_date = None
-
-        with pdfplumber.open(uploaded_file) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if page_num == 0 and text:
-                    store_match = re.search(r"Store Name:\s*(.*)", text)
-                    if store_match:
-                        store_name = store_match.group(1).strip()
-                    for table in page.extract_tables():
-                        for i, row in enumerate(table):
-                            if i == 0 and "Last 4 Weeks" in row:
-                                raw_date = [date for date in row if date != None]
-                
-                for table in page.extract_tables():
-                    for row in table:
-                        if not row or not row[0]:
-                            continue
-                        first_cell = str(row[0]).strip()
-                        if is_all_caps(first_cell) or is_numeric_row(row):
-                            continue
-                        if is_valid_text(first_cell):
-                            clean_rows.append(row)
-
-        if not clean_rows:
+        uploads = [f.getvalue() for f in uploaded_files]
+        # Parsed in the background; the same file already being parsed is not parsed again.
+        # Finished results are kept in this session, not in the queue.
+        parse_jobs, results = get_job_queue().gather("waste", uploads, st.session_state.setdefault("waste_parsed", {}))
+        if any(report is None and job.error is None for job, report in zip(parse_jobs, results)):
+            for uploaded_file, job in zip(uploaded_files, parse_jobs):
+                st.progress(job.fraction, text=f"⏳ {uploaded_file.name}: {job.describe()}")
+            time.sleep(0.5)
+            st.rerun()
+
+        reports = []
+        for uploaded_file, data, job, report in zip(uploaded_files, uploads, parse_jobs, results):
+            if job.error is not None:
+                st.error(f"Could not read {uploaded_file.name}: {job.error}")
+                continue
+            if report.df.empty:
+                st.warning(f"No valid data found in {uploaded_file.name}.")
+                continue
+            reports.append(report)
+            try:
+                record_waste_report(report, content_hash(data))
+            except sqlite3.Error as e:
+                st.warning(f"Could not save {uploaded_file.name} to the trends history: {e}")
+
+        if not reports:
             st.error("No valid data found in the uploaded PDF.")
         else:
-            raw_date.pop()
-            clean_date = [raw_date[0],raw_date[-1]]
-            if len(raw_date) < 2:
-                clean_date = ["Unknown", "Unknown"]
-            df = pd.DataFrame(clean_rows)
-            df.columns = [f"col{i+1}" for i in range(len(df.columns))]
-
-            df["Item"] = df["col1"].str.replace(r"\s+", " ", regex=True).str.strip()
-            df["is_pastry"] = df["Item"].str.lower().str.contains(
-                "|".join([re.escape(name.lower()) for name in pastry_keywords])
-            )
-
-            df[["col10", "col11"]] = df[["col10", "col11"]].apply(pd.to_numeric, errors="coerce")
-            df = df.rename(columns={"col10": "Sold", "col11": "Waste"})
-            df = df[["Item", "is_pastry", "Sold", "Waste"]].dropna(subset=["Sold", "Waste"])
-            df["Waste_pct"] = (df["Waste"] / (df["Sold"] + df["Waste"]) * 100).round(2)
-
-
-            df_pastries = df[df["is_pastry"]].copy()
-            df_non_pastries = df[~df["is_pastry"]].copy()
-
-            top10_non_pastries = df_non_pastries.sort_values(by="Waste_pct", ascending=False).head(10)
-            top10_pastries = df_pastries.sort_values(by="Waste_pct", ascending=False).head(10)
-
-            subheader = f"Top 10 Most Wasted Products – {store_name}" if store_name else "Top 10 Most Wasted Products"
-            st.subheader(subheader)
-            
-            st.caption(f"Data from {clean_date[1]} to {clean_date[0]}")
-            
-            st.dataframe(top10_non_pastries[["Item","Sold", "Waste", "Waste_pct"]], use_container_width=True)
-
-            # --- Create PDF for both charts ---
-            pdf_buffer = BytesIO()
-            with PdfPages(pdf_buffer) as pdf:
-                # Non-pastry chart
-                fig1, ax1 = plt.subplots(figsize=(9, 5))
-                bars1 = ax1.barh(top10_non_pastries["Item"], top10_non_pastries["Waste_pct"], color="gray", edgecolor="black")
-                for bar in bars1:
-                    ax1.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2, f"{bar.get_width():.1f}%", va='center')
-                ax1.set_title(f"Top 10 Most Wasted Products\n{store_name or ''}\n{clean_date[1] or ''} – {clean_date[0] or ''}", fontsize=14)
-                ax1.set_xlabel("Waste %")
-                ax1.set_ylabel("Product")
-                ax1.invert_yaxis()
-                ax1.grid(True, linestyle="--", alpha=0.5)
-                fig1.tight_layout()
-                pdf.savefig(fig1)
-                st.pyplot(fig1)  # Show the figure in Streamlit
-                plt.close(fig1)
-
-                # Pastry chart
-                if not top10_pastries.empty:
-                    subheader_pastries = f"Top 10 Most Wasted Pastries – {store_name}" if store_name else "Top 10 Most Wasted Pastries"
-                    st.subheader(subheader_pastries)
-                    st.dataframe(top10_pastries[["Item", "Sold", "Waste", "Waste_pct"]], use_container_width=True)
-                    fig2, ax2 = plt.subplots(figsize=(9, 5))
-                    bars2 = ax2.barh(top10_pastries["Item"], top10_pastries["Waste_pct"], color="lightgray", edgecolor="black")
-                    for bar in bars2:
-                        ax2.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2, f"{bar.get_width():.1f}%", va='center')
-                    ax2.set_title(f"Top 10 Most Wasted Pastries\n{store_name or ''}\n{clean_date[1] or ''} – {clean_date[0] or ''}", fontsize=14)
-                    ax2.set_xlabel("Waste %")
-                    ax2.set_ylabel("Pastry Item")
-                    ax2.invert_yaxis()
-                    ax2.grid(True, linestyle="--", alpha=0.5)
-                    fig2.tight_layout()
-                    pdf.savefig(fig2)
-                    st.pyplot(fig2)
-                    plt.close(fig2)
-            
+            batch = len(reports) > 1
+
+            # --- One PDF with a section per store; charts only on screen for a single store ---
+            rendered = render_waste_report(reports, png=not batch)
+            for report, charts in zip(reports, rendered.sections):
+                df, store_name, clean_date = report
+                container = st.expander(store_name or "Unknown store") if batch else st.container()
+                with container:
+                    for kind, top10, png in charts:
+                        heading = kind.title()
+                        subheader = f"Top {TOP_N} Most Wasted {heading} – {store_name}" if store_name else f"Top {TOP_N} Most Wasted {heading}"
+                        st.subheader(subheader)
+                        if kind == "products":
+                            st.caption(f"Data from {clean_date[1]} to {clean_date[0]}")
+                        st.dataframe(top10[["Item", "Sold", "Waste", "Waste_pct"]], use_container_width=True)
+                        if png:
+                            st.image(png)
+
+            if batch:
+                st.subheader(f"Cross-Store Waste Ranking – {len(reports)} stores")
+                # Only the top rows unless asked, so the full ranking is never built by default
+                show_all = st.checkbox("Show every item", key="ranking_show_all")
+                ranking = cross_store_ranking(reports, k=None if show_all else 50)
+                st.dataframe(ranking, use_container_width=True, hide_index=True)
+                report_label = f"{len(reports)} stores"
+                file_stub = "Area"
+            else:
+                report_label = f"{store_name} ({clean_date[1]} - {clean_date[0]})"
+                file_stub = store_name
+
             with tab1:
                 st.download_button(
                     label="📄 Download report as PDF",
-                    data=pdf_buffer.getvalue(),
+                    data=rendered.pdf,
                     file_name="waste_report.pdf",
                     mime="application/pdf"
                 )
@@ -183,32 +108,56 @@ if uploaded_file:
                         st.error("❌ Please enter a valid email address.")
                     else:
                         try:
-                            report_filename = f"{store_name}_Waste_Report.pdf"
-                            with open(report_filename, "wb") as f:
-                                f.write(pdf_buffer.getvalue())
-                            config = get_email_config()    
-                            success = send_email_with_reports(
-                            sender_email=config["sender_email"],
-                            sender_password=config["sender_password"],
-                            smtp_server=config["smtp_server"],
-                            smtp_port=config["smtp_port"],
-                            recipient_email=recipient_email,
-                            subject="📊 Your Report from the Waste & Sales Tool",
-                            body=f'''Hi there! Attached is your report for {store_name} ({clean_date[1]} - {clean_date[0]})\n.
+                            job = queue_email_with_reports(
+                                recipient_email=recipient_email,
+                                subject="📊 Your Report from the Waste & Sales Tool",
+                                body=f'''Hi there! Attached is your report for {report_label}\n.
                             \nBest Regards,\nThe Waste & Sales Tool Bot\n\n\nPlease do not reply to this email, it is sent from an unmonitored address.''',
-                            pdf_paths=[report_filename]
-                        )
-                            if success:
-                                st.success("📬 Report sent successfully!")
-                                os.remove(report_filename)
-   
+                                attachments=[(f"{file_stub}_Waste_Report.pdf", rendered.pdf)],
+                            )
+                            st.session_state["waste_email_job"] = job.job_id
                         except Exception as e:
                             st.error(f"Failed to send email: {e}")
+                if "waste_email_job" in st.session_state:
+                    show_email_status(st.session_state["waste_email_job"])
+
+                st.markdown("---")
+                st.markdown("**📋 Distribution list** – email every store its own report.")
+                list_file = st.file_uploader("Recipients per store (CSV with store,email columns or TOML)", type=["csv", "toml"])
+                distribution = parse_distribution_list(list_file.getvalue(), list_file.name) if list_file else load_distribution_list()
+                if not distribution:
+                    st.caption("No distribution list configured; upload one to send to every store.")
+                elif st.button("Send to distribution list"):
+                    # Reports without a store name go under "Unknown", so they show up as missing
+                    # recipients instead of silently not being sent; one store can have several reports
+                    attachments_by_store = {}
+                    for report in reports:
+                        store = report.store_name or "Unknown"
+                        attachments = attachments_by_store.setdefault(store, [])
+                        suffix = f"_{len(attachments) + 1}" if attachments else ""
+                        attachments.append((f"{store}_Waste_Report{suffix}.pdf", render_waste_report([report], png=False).pdf))
+                    try:
+                        jobs, invalid, missing = send_to_distribution_list(
+                            distribution,
+                            attachments_by_store,
+                            subject="📊 Your Report from the Waste & Sales Tool",
+                            body_for=lambda store: f'''Hi there! Attached is the waste report for {store}.\n\nBest Regards,\nThe Waste & Sales Tool Bot\n\n\nPlease do not reply to this email, it is sent from an unmonitored address.''',
+                        )
+                        st.session_state["waste_bulk_jobs"] = [job.job_id for job in jobs]
+                        for store, email in invalid:
+                            st.warning(f"Skipped invalid address {email} for {store}.")
+                        if missing:
+                            st.warning(f"No recipients listed for: {', '.join(missing)}")
+                    except Exception as e:
+                        st.error(f"Failed to send emails: {e}")
+                if "waste_bulk_jobs" in st.session_state:
+                    show_bulk_status(st.session_state["waste_bulk_jobs"])
 
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
 
+show_timings(run, parse_jobs)
 
 st.caption(""":male-technologist: **Developed by** [Alexander Vindel](https://github.com/j-alex-vindel)""")
\ No newline at end of file
@@ -1,45 +1,17 @@
 import streamlit as st
-import pdfplumber
-import pandas as pd
-import matplotlib.pyplot as plt
-import re
-from io import BytesIO
-from matplotlib.backends.backend_pdf import PdfPages
-import numpy as np
-import base64
-from email_utils import send_email_with_reports, validate_email,get_email_config
-import os
-
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-
-    css = f"""
-    <style>
-    .stApp {{
-        background: url("data:image/jpg;base64,{encoded}") no-repeat center center fixed;
-        background-size: cover;
-        position: relative;
-    }}
-
-    .stApp::before {{
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        height: 100%;
-        width: 100%;
-        background: rgba(255, 255, 255, 0.75); /* White overlay with 75% opacity */
-        z-index: 0;
-    }}
-
-    .stApp > * {{
-        position: relative;
-        z-index: 1;
-    }}
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
+from theme import add_bg_from_local
+from debug_utils import show_timings
+import sqlite3
+import time
+from email_utils import (
+    load_distribution_list, parse_distribution_list, queue_email_with_reports, send_to_distribution_list,
+    show_bulk_status, show_email_status, validate_email,
+)
+from waste_report.cache import content_hash
+from waste_report.profiling import start_run
+
+# Timings are only collected with REPORT_PROFILE=1
+run = start_run("single_origin_page")
 
 # 🔁 Add background image
 add_bg_from_local("assests/coffebean_so.jpg")
@@ -49,138 +21,180 @@ tab1, tab2 = st.tabs(["⬇️ Download Report", "📧 Email Report"])
 st.title("📁 Single Origin")
 st.info("This feature will allow you to plot and track single origin sales.")
 
-uploaded_file = st.file_uploader("Upload your PDF report - Single Origin Espresso Sales Report - (Colin)", type="pdf")
+uploaded_files = st.file_uploader(
+    "Upload your PDF report(s) - Single Origin Espresso Sales Report - (Colin)", type="pdf", accept_multiple_files=True
+)
+
+parse_jobs = []
+if uploaded_files:
+    # Imported once there is something to read: these pull in pandas, matplotlib and pdfplumber
+    from waste_report.charts import render_single_origin
+    from waste_report.history import record_single_origin_report
+    from waste_report.jobs import get_job_queue
 
-if uploaded_file:
     try:
-        rows_cleaned = []
-        store_name = None
-        date = None
-        with pdfplumber.open(uploaded_file) as pdf:
-            title = pdf.metadata.get("Title", "Unknown Title").strip()
-            first_page = pdf.pages[0]   
-            if not title or "Single Origin" not in title:
-                first_page_text = first_page.extract_text()
-                if "Single Origin" not in first_page_text:
-                    st.error("This PDF does not appear to be a Single Origin report.")
-                    st.stop()
+        uploads = [f.getvalue() for f in uploaded_files]
+        # Finished results are kept in this session, not in the queue
+        parse_jobs, results = get_job_queue().gather(
+            "single_origin", uploads, st.session_state.setdefault("so_parsed", {})
+        )
+        pending = sum(report is None and job.error is None for job, report in zip(parse_jobs, results))
+        if pending:
+            if len(parse_jobs) == 1:
+                st.progress(parse_jobs[0].fraction, text=f"⏳ Reading {uploaded_files[0].name}: {parse_jobs[0].describe()}")
+            else:
+                st.progress((len(parse_jobs) - pending) / len(parse_jobs), text=f"⏳ Read {len(parse_jobs) - pending} of {len(parse_jobs)} reports")
+            time.sleep(0.5)
+            st.rerun()
+        if len(parse_jobs) == 1 and parse_jobs[0].error is not None:
+            st.error(str(parse_jobs[0].error))
+            st.stop()
+
+        reports, unreadable = [], []
+        # Saved to the trends history once per session, not on every rerun
+        recorded = st.session_state.setdefault("so_recorded", set())
+        for uploaded_file, data, job, report in zip(uploaded_files, uploads, parse_jobs, results):
+            if job.error is not None:
+                unreadable.append(uploaded_file.name)
+                continue
+            reports.append(report)
+            sha256 = content_hash(data)
+            if sha256 in recorded:
+                continue
+            try:
+                record_single_origin_report(report, sha256)
+                recorded.add(sha256)
+            except sqlite3.Error as e:
+                st.warning(f"Could not save {uploaded_file.name} to the trends history: {e}")
+        if unreadable:
+            st.warning(f"Skipped {len(unreadable)} file(s) that are not Single Origin reports: {', '.join(unreadable)}")
+        if not reports:
+            st.error("None of the uploaded PDFs are Single Origin reports.")
+            st.stop()
+
+        if len(reports) > 1:
+            # --- Comparison across weeks and stores ---
+            from waste_report.compare import ROLLING_WEEKS, compare_staff
+            from waste_report.schema import to_week
+
+            comparison = compare_staff(reports)
+            stores = {report.store_name or "Unknown" for report in reports}
+            undated = sum(to_week(report.date) is None for report in reports)
+            st.success(
+                f"Compared {len(reports)} reports: {len(stores)} store(s), "
+                f"{comparison.mix.shape[1]} week(s), {len(comparison.summary)} staff"
+            )
+            if undated:
+                st.warning(f"{undated} report(s) have no readable date and were left out of the comparison.")
+
+            if comparison.mix.empty:
+                st.error("No staff rows with a readable week to compare.")
             else:
-                st.success(f"Processing PDF: {title}")
-                table = first_page.extract_table()
-                text = first_page.extract_text()
-                date = text.split("\n")[0]
-                date = '-'.join(date.split()[-4:-1])
-                if not date:
-                    date = "Unknown Date"
-
-                for i,row in enumerate(table):
-                    if not row or (len(row) < 2) or (row[0] is None and row[1] is None):
-                        continue
-
-                    if i == 2 and len(row) > 1 and row[1]:
-                        store_name = row[1].strip()
-
-                    if i >= 3 and len(row) > 5:
-                        name = row[1].strip() if row[1] else None
-                        p_week = row[-3].strip() if row[-3] else None
-                        mix_pct = row[-1].strip() if row[-1] else None
-                        if name and mix_pct:
-                            rows_cleaned.append((name, p_week, mix_pct))    
-                # Create DataFrame
-                df = pd.DataFrame(rows_cleaned, columns=["Name", "Previous Week", "Mix % Last"])
-                df = df[~df["Name"].str.contains(r"Cashier|Barista|Shift", case=False, na=False)]
-                df["Name"] = df["Name"].str.strip()
-                # Convert and replace NaN with 0
-                df["Mix % Last"] = pd.to_numeric(df["Mix % Last"].str.replace('%', ''), errors="coerce").fillna(0)
-                df["Previous Week"] = pd.to_numeric(df["Previous Week"].str.replace('%',''), errors="coerce").fillna(0)
-                df["Improvement"] = df["Mix % Last"] - df["Previous Week"]     
-                df_sorted = df.sort_values(by="Mix % Last", ascending=False)
-
-
-                # Show results
-                st.subheader(f"🏪 {store_name} - {title} - {date}")
-                st.dataframe(df,use_container_width=True)
-
-                pdf_buffer = BytesIO()
-                with PdfPages(pdf_buffer) as pdf_pages:
-                    fig, ax = plt.subplots(figsize=(12, 6))
-                    names = df_sorted["Name"]
-                    x = np.arange(len(names))
-                    wraped_names = [name.replace(" ", "\n") if len(name) > 12 else name for name in names]
-                    gap = 0.6
-                    # Plotting
-                    names = df_sorted["Name"]
-                    x = np.arange(len(names))
-                
-                    gap = 0.6  # space between groups
-                    x = np.arange(len(names)) * (1 + gap)
-                    
-                    width = 0.2
-
-                    fig, ax = plt.subplots(figsize=(9, 5))
-                    # Bars
-                    bar1 = ax.bar(x - width, df_sorted["Previous Week"], width, label="Previous Week", color="lightgray", edgecolor="black")
-                    bar2 = ax.bar(x, df_sorted["Mix % Last"], width, label="Last Week", color="darkgray", edgecolor="black")
-                    bar3 = ax.bar(x + width, df_sorted["Improvement"], width, label="Improvement", color="green", edgecolor="black")
-
-                    # Labels and styling
-                    ax.set_ylabel("Mix %")
-                    ax.set_title(f"Mix % Comparison by Team Member - {store_name} - {date}")
-                    ax.set_xticks(x)
-                    ax.set_xticklabels(wraped_names, fontsize=9, fontfamily='monospace')
-                    plt.subplots_adjust(bottom=0.25)
-                    ax.legend()
-                    ax.grid(True, linestyle="--", axis="y", alpha=0.5)
-
-                    # Display in Streamlit
-                    pdf_pages.savefig(fig)
-                    fig.tight_layout()
-                    st.pyplot(fig)
-                    plt.close(fig)
+                st.subheader("👥 Staff across weeks")
+                st.dataframe(comparison.summary, use_container_width=True, hide_index=True)
+
+                matrices = {
+                    "Mix %": comparison.mix,
+                    f"Rolling {ROLLING_WEEKS}-week average": comparison.rolling,
+                    "Rank": comparison.rank,
+                    "Rank change": comparison.rank_change,
+                }
+                view = st.radio("Staff x week", list(matrices), horizontal=True)
+                matrix = matrices[view].rename(columns=lambda week: week.strftime("%d %b %Y"))
+                st.dataframe(matrix, use_container_width=True)
+
+                names = comparison.summary["Name"].tolist()
+                selected = st.multiselect(f"Rolling {ROLLING_WEEKS}-week Mix % for", names, default=names[:10])
+                if selected:
+                    st.line_chart(comparison.rolling.loc[selected].T)
 
                 with tab1:
                     st.download_button(
-                    label="📄 Download report as PDF",
-                    data=pdf_buffer.getvalue(),
-                    file_name="SO_report.pdf",
-                    mime="application/pdf"
-                )
-                with tab2:
-                    st.markdown("Enter your email below to receive the report directly in your inbox.")
-                    recipient_email = st.text_input("Recipient Email Address")
-                    st.caption("Please ensure you enter a valid email address. Your email will not be stored or used for any other purpose.")
-                    if st.button("Send Report"):
-                        if not recipient_email:
-                            st.warning("Please enter an email address.")
-                        elif not validate_email(recipient_email):
-                            st.error("❌ Please enter a valid email address.")
-                        else:
-                            try:
-                                report_filename = f"{store_name}_SingleOrigin.pdf"
-                                with open(report_filename, "wb") as f:
-                                    f.write(pdf_buffer.getvalue())
-                                config = get_email_config()
-                                success = send_email_with_reports(
-                                sender_email=config["sender_email"],
-                                sender_password=config["sender_password"],
-                                smtp_server=config["smtp_server"],
-                                smtp_port=config["smtp_port"],
+                        label="📄 Download staff summary as CSV",
+                        data=comparison.summary.to_csv(index=False),
+                        file_name="SO_staff_summary.csv",
+                        mime="text/csv",
+                    )
+                    st.download_button(
+                        label=f"📄 Download {view} matrix as CSV",
+                        data=matrix.to_csv(),
+                        file_name="SO_staff_weeks.csv",
+                        mime="text/csv",
+                    )
+            with tab2:
+                st.caption("Emailing works on one report at a time; upload a single PDF to send it.")
+        else:
+            report = reports[0]
+            df, store_name, title, date = report
+            st.success(f"Processing PDF: {title}")
+
+            # Show results
+            st.subheader(f"🏪 {store_name} - {title} - {date}")
+            st.dataframe(df,use_container_width=True)
+
+            # Rendered once to PDF and PNG; reruns with the same data reuse both
+            rendered = render_single_origin([(df, store_name, date)])
+            st.image(rendered.sections[0][0].png)
+
+            with tab1:
+                st.download_button(
+                label="📄 Download report as PDF",
+                data=rendered.pdf,
+                file_name="SO_report.pdf",
+                mime="application/pdf"
+            )
+            with tab2:
+                st.markdown("Enter your email below to receive the report directly in your inbox.")
+                recipient_email = st.text_input("Recipient Email Address")
+                st.caption("Please ensure you enter a valid email address. Your email will not be stored or used for any other purpose.")
+                if st.button("Send Report"):
+                    if not recipient_email:
+                        st.warning("Please enter an email address.")
+                    elif not validate_email(recipient_email):
+                        st.error("❌ Please enter a valid email address.")
+                    else:
+                        try:
+                            job = queue_email_with_reports(
                                 recipient_email=recipient_email,
                                 subject="📊 Your Report from the Waste & Sales Tool",
                                 body=f'''Hi there! Attached is your report for {store_name} ({date})\n.
-                                \nBest Regards,\nThe Waste & Sales Tool Bot\n\n\nPlease do not reply to this email, it is sent from an unmonitored address.''',
-                                pdf_paths=[report_filename]
+                        \nBest Regards,\nThe Waste & Sales Tool Bot\n\n\nPlease do not reply to this email, it is sent from an unmonitored address.''',
+                                attachments=[(f"{store_name}_SingleOrigin.pdf", rendered.pdf)],
                             )
-                                if success:
-                                    st.success("📬 Report sent successfully!")
-                                    os.remove(report_filename)
-    
-                            except Exception as e:
-                                st.error(f"Failed to send email: {e}")
-
+                            st.session_state["so_email_job"] = job.job_id
+                        except Exception as e:
+                            st.error(f"Failed to send email: {e}")
+                if "so_email_job" in st.session_state:
+                    show_email_status(st.session_state["so_email_job"])
+
+                st.markdown("---")
+                st.markdown("**📋 Distribution list** – email this report to everyone listed for the store.")
+                list_file = st.file_uploader("Recipients per store (CSV with store,email columns or TOML)", type=["csv", "toml"])
+                distribution = parse_distribution_list(list_file.getvalue(), list_file.name) if list_file else load_distribution_list()
+                if not distribution:
+                    st.caption("No distribution list configured; upload one to send to the store's recipients.")
+                elif st.button("Send to distribution list"):
+                    try:
+                        jobs, invalid, missing = send_to_distribution_list(
+                            distribution,
+                            {store_name or "Unknown": [(f"{store_name}_SingleOrigin.pdf", rendered.pdf)]},
+                            subject="📊 Your Report from the Waste & Sales Tool",
+                            body_for=lambda store: f'''Hi there! Attached is the Single Origin report for {store} ({date}).\n\nBest Regards,\nThe Waste & Sales Tool Bot\n\n\nPlease do not reply to this email, it is sent from an unmonitored address.''',
+                        )
+                        st.session_state["so_bulk_jobs"] = [job.job_id for job in jobs]
+                        for store, email in invalid:
+                            st.warning(f"Skipped invalid address {email} for {store}.")
+                        if missing:
+                            st.warning(f"No recipients listed for: {', '.join(missing)}")
+                    except Exception as e:
+                        st.error(f"Failed to send emails: {e}")
+                if "so_bulk_jobs" in st.session_state:
+                    show_bulk_status(st.session_state["so_bulk_jobs"])
 
     except Exception as e:
         st.error(f"Error processing the file: {e}")
         st.stop()
 
+show_timings(run, parse_jobs)
+
 st.caption(""":male-technologist: **Developed by** [Alexander Vindel](https://github.com/j-alex-vindel)""")
\ No newline at end of file
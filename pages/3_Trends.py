@@ -0,0 +1,64 @@
+import streamlit as st
+from theme import add_bg_from_local
+from datetime import date
+from waste_report import history
+
+# 🔁 Add background image
+add_bg_from_local("assests/report.jpg")
+
+# --- Streamlit app ---
+st.title("📈 Trends")
+st.info("Track waste % and Single Origin mix % across weeks and stores for every report uploaded so far.")
+
+tab1, tab2 = st.tabs(["🗑️ Waste %", "☕ Single Origin Mix %"])
+
+
+def week_range(first, last, key):
+    """Date range picker over the stored weeks; returns (start, end), either may be None."""
+    weeks = st.date_input(
+        "Weeks", value=(date.fromisoformat(first), date.fromisoformat(last)), key=key
+    )
+    weeks = weeks if isinstance(weeks, tuple) else (weeks,)
+    start = weeks[0] if len(weeks) > 0 else None
+    end = weeks[1] if len(weeks) > 1 else None
+    return start, end
+
+
+with tab1:
+    first, last = history.week_bounds("waste")
+    if first is None:
+        st.info("No waste reports saved yet. Upload one on the Waste Report page.")
+    else:
+        stores = st.multiselect("Stores", history.distinct("waste", "store"), key="waste_stores")
+        items = st.multiselect("Items", history.distinct("waste", "item", stores), key="waste_items")
+        start, end = week_range(first, last, "waste_weeks")
+
+        # Aggregated in SQLite; only one row per week and store/item comes back
+        column = "item" if items else "store"
+        totals = history.waste_totals(column, stores, items, start, end)
+        if totals.empty:
+            st.warning("No saved waste data matches these filters.")
+        else:
+            st.subheader("Waste % per item" if items else "Waste % per store")
+            st.line_chart(totals.pivot(index="week", columns=column, values="waste_pct"))
+            st.dataframe(totals, use_container_width=True, hide_index=True)
+
+with tab2:
+    first, last = history.week_bounds("single_origin")
+    if first is None:
+        st.info("No Single Origin reports saved yet. Upload one on the Single Origin page.")
+    else:
+        stores = st.multiselect("Stores", history.distinct("single_origin", "store"), key="so_stores")
+        names = st.multiselect("Staff", history.distinct("single_origin", "name", stores), key="so_names")
+        start, end = week_range(first, last, "so_weeks")
+
+        column = "name" if names else "store"
+        totals = history.single_origin_totals(column, stores, names, start, end)
+        if totals.empty:
+            st.warning("No saved Single Origin data matches these filters.")
+        else:
+            st.subheader("Mix % per staff member" if names else "Average mix % per store")
+            st.line_chart(totals.pivot(index="week", columns=column, values="mix_pct"))
+            st.dataframe(totals, use_container_width=True, hide_index=True)
+
+st.caption(""":male-technologist: **Developed by** [Alexander Vindel](https://github.com/j-alex-vindel)""")
@@ -0,0 +1,70 @@
+"""The two-level report cache: memory LRU, disk pruning and corrupt entries."""
+import os
+import time
+
+from waste_report.cache import ReportCache, cached_parse
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_memory_level_drops_least_recently_used():
+    cache = ReportCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_disk_level_survives_a_new_process(tmp_path):
+    ReportCache(cache_dir=tmp_path).set("report", {"rows": 3})
+    assert ReportCache(cache_dir=tmp_path).get("report") == {"rows": 3}
+
+
+def test_entries_older_than_max_age_are_removed(tmp_path):
+    ReportCache(cache_dir=tmp_path).set("old", "value")
+    age(tmp_path / "old.pkl", 120)
+
+    assert ReportCache(cache_dir=tmp_path, max_age=60).get("old") is None
+    assert not (tmp_path / "old.pkl").exists()
+
+
+def test_size_limit_removes_least_recently_used_files(tmp_path):
+    writer = ReportCache(cache_dir=tmp_path)
+    for i, key in enumerate(["first", "second", "third"]):
+        writer.set(key, b"x" * 4_000)
+        age(tmp_path / f"{key}.pkl", 100 - i)
+
+    cache = ReportCache(maxsize=1, cache_dir=tmp_path, max_bytes=10_000)
+    # Reading "first" back from disk makes it the most recently used
+    assert cache.get("first") is not None
+    cache.set("fourth", b"x" * 4_000)
+
+    assert sorted(os.listdir(tmp_path)) == ["first.pkl", "fourth.pkl"]
+
+
+def test_corrupt_file_is_a_miss_and_is_removed(tmp_path):
+    (tmp_path / "broken.pkl").write_bytes(b"not a pickle")
+    cache = ReportCache(cache_dir=tmp_path)
+
+    assert cache.get("broken") is None
+    assert not (tmp_path / "broken.pkl").exists()
+    cache.set("broken", "fixed")
+    assert ReportCache(cache_dir=tmp_path).get("broken") == "fixed"
+
+
+def test_cached_parse_parses_identical_bytes_once():
+    calls = []
+
+    def parse(data):
+        calls.append(data)
+        return len(data)
+
+    cache = ReportCache()
+    assert cached_parse("waste", parse, b"abc", cache) == 3
+    assert cached_parse("waste", parse, b"abc", cache) == 3
+    assert cached_parse("single_origin", parse, b"abc", cache) == 3
+    assert calls == [b"abc", b"abc"]
@@ -0,0 +1,66 @@
+"""Joining Single Origin reports across weeks and stores."""
+import pandas as pd
+
+from waste_report.compare import compare_staff, normalise_names
+from waste_report.parser import SingleOriginReport, build_single_origin_dataframe
+
+
+def report(store, date, *staff):
+    """A parsed report with (name, Mix % Last) staff rows and a 0% previous week."""
+    rows = [(name, "0%", f"{mix}%") for name, mix in staff]
+    return SingleOriginReport(build_single_origin_dataframe(rows), store, "Single Origin Espresso Sales Report", date)
+
+
+def test_names_ignore_case_spacing_and_punctuation():
+    assert normalise_names(["Alice  Smith", "ALICE SMITH.", " alice smith", None]).tolist() == [
+        "alice smith", "alice smith", "alice smith", "",
+    ]
+
+
+def test_same_person_is_joined_across_weeks_and_stores():
+    comparison = compare_staff([
+        report("Store A", "27 Oct 2025", ("Alice Smith", 10)),
+        report("Store B", "03 Nov 2025", ("ALICE  SMITH.", 30)),
+    ])
+
+    summary = comparison.summary.iloc[0]
+    assert len(comparison.summary) == 1
+    # Shown under the spelling from the latest report
+    assert summary["Name"] == "ALICE  SMITH."
+    assert summary["Stores"] == "Store A, Store B"
+    assert summary["Weeks"] == 2
+    assert comparison.mix.iloc[0].tolist() == [10.0, 30.0]
+
+
+def test_rank_and_rank_change_per_week():
+    comparison = compare_staff([
+        report("Store A", "27 Oct 2025", ("Alice", 10), ("Bob", 20)),
+        report("Store A", "03 Nov 2025", ("Alice", 30), ("Bob", 5)),
+    ], window=2)
+
+    assert comparison.rank.loc["Alice"].tolist() == [2, 1]
+    assert comparison.rank.loc["Bob"].tolist() == [1, 2]
+    assert comparison.rank_change.loc["Alice"].tolist() == [pd.NA, 1]
+    assert comparison.rank_change.loc["Bob"].tolist() == [pd.NA, -1]
+    assert comparison.rolling.loc["Alice"].tolist() == [10.0, 20.0]
+
+    summary = comparison.summary.set_index("Name")
+    assert summary.loc["Alice", ["Rank", "Rank change"]].tolist() == [1, 1]
+    assert summary.loc["Bob", ["Rank", "Rank change"]].tolist() == [2, -1]
+
+
+def test_same_name_in_two_stores_one_week_is_averaged():
+    comparison = compare_staff([
+        report("Store A", "03 Nov 2025", ("Alice", 10)),
+        report("Store B", "03 Nov 2025", ("alice", 20)),
+    ])
+    assert comparison.mix.iloc[0].tolist() == [15.0]
+
+
+def test_undated_reports_are_left_out():
+    comparison = compare_staff([
+        report("Store A", "03 Nov 2025", ("Alice", 10)),
+        report("Store B", "Unknown Date", ("Bob", 50)),
+    ])
+    assert comparison.summary["Name"].tolist() == ["Alice"]
+    assert list(comparison.mix.columns) == [pd.Timestamp("2025-11-03")]
@@ -0,0 +1,100 @@
+"""SMTPSession and EmailDispatcher against a local aiosmtpd server."""
+import smtplib
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from email_utils import EmailDispatcher, SMTPSession
+
+REFUSED = "nobody@example.com"
+
+
+class RecordingHandler:
+    """Accepts every message, remembering which connection it came in on; refuses REFUSED."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REFUSED:
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((session.peer, envelope.rcpt_tos[0]))
+        return "250 Message accepted"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    if controller._thread is not None:
+        controller.stop()
+
+
+def message(recipient):
+    msg = EmailMessage()
+    msg["From"] = "reports@example.com"
+    msg["To"] = recipient
+    msg["Subject"] = "Waste report"
+    msg.set_content("Attached.")
+    return msg
+
+
+def session_for(controller, **options):
+    return SMTPSession(
+        "reports@example.com", None, controller.hostname, controller.port, starttls=False, backoff=0, **options
+    )
+
+
+def test_reconnects_after_server_drops_connection(smtp_server):
+    controller, handler = smtp_server
+    session = session_for(controller)
+    assert session.send(message("a@example.com")) == 1
+
+    # A restarted server has closed the connection the session is holding open
+    controller.stop()
+    restarted = Controller(handler, hostname=controller.hostname, port=controller.port)
+    restarted.start()
+    try:
+        assert session.send(message("b@example.com")) == 2
+    finally:
+        session.close()
+        restarted.stop()
+
+    assert [recipient for _, recipient in handler.received] == ["a@example.com", "b@example.com"]
+    assert handler.received[0][0] != handler.received[1][0]
+
+
+def test_permanent_error_is_not_retried(smtp_server):
+    controller, handler = smtp_server
+    session = session_for(controller, retries=3)
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        session.send(message(REFUSED))
+    assert session.attempts == 1
+    assert handler.received == []
+
+
+def test_messages_share_one_connection(smtp_server):
+    controller, handler = smtp_server
+    dispatcher = EmailDispatcher([session_for(controller)])
+    jobs = dispatcher.submit_many([("Store 1", message(f"manager{i}@example.com")) for i in range(5)])
+    dispatcher.join()
+    dispatcher.sessions[0].close()
+
+    assert [job.status for job in jobs] == ["sent"] * 5
+    assert [job.attempts for job in jobs] == [1] * 5
+    assert len(handler.received) == 5
+    assert len({peer for peer, _ in handler.received}) == 1
@@ -0,0 +1,49 @@
+"""Routing uploads between registered versions of one report layout."""
+from io import BytesIO
+
+import pytest
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from waste_report.formats import FORMATS, ReportFormat, detect, route
+from waste_report.parser import WasteLayout, parse_waste_report
+
+OLD = next(report_format for report_format in FORMATS if report_format.name == "waste")
+# Same default "Food Sales" title as the old version, told apart by its header
+NEW = ReportFormat(
+    "waste-2026", "waste", "4 Weekly Food Sales report",
+    WasteLayout(header=("Store Name", "Waste Qty"), sold=10, waste=12), parse_waste_report,
+)
+REGISTERED = (NEW,) + tuple(FORMATS)
+
+
+def report_pdf(title, header):
+    """A one-page PDF with this metadata title and text at the top of the page."""
+    fig = Figure(figsize=(11.69, 8.27))
+    fig.text(0.03, 0.95, header, fontsize=9)
+    buffer = BytesIO()
+    with PdfPages(buffer, metadata={"Title": title, "CreationDate": None}) as pdf:
+        pdf.savefig(fig)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("Store Name: Old Street", OLD),
+    ("Store Name: New Street    Waste Qty", NEW),
+])
+def test_versions_sharing_a_title_are_told_apart_by_header(header, expected):
+    pdf = report_pdf("4 Weekly Food Sales by Store", header)
+    assert detect(pdf, REGISTERED) is expected
+    assert route(pdf, "waste", REGISTERED) is expected
+
+
+def test_shared_title_without_either_header_goes_to_oldest_version():
+    pdf = report_pdf("4 Weekly Food Sales by Store", "Something else entirely")
+    assert detect(pdf, REGISTERED) is OLD
+
+
+def test_title_claimed_by_one_format_skips_header():
+    pdf = report_pdf("Single Origin Espresso Sales Report", "Store Name: Waste Qty")
+    assert detect(pdf, REGISTERED).kind == "single_origin"
+    with pytest.raises(ValueError, match="looks like a Single Origin report"):
+        route(pdf, "waste", REGISTERED)
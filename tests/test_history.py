@@ -0,0 +1,72 @@
+"""Recording parsed reports in the SQLite history and reading trends back."""
+from waste_report import history
+from waste_report.parser import SingleOriginReport, WasteReport, build_single_origin_dataframe, build_waste_dataframe
+
+
+def waste_report(store, latest, *items):
+    """A parsed waste report with (item, sold, waste) rows for the four weeks ending latest."""
+    rows = [[name] + [None] * 8 + [str(sold), str(waste)] for name, sold, waste in items]
+    return WasteReport(build_waste_dataframe(rows), store, [latest, "14/10/2025"])
+
+
+def single_origin_report(store, date, *staff):
+    rows = [(name, f"{previous}%", f"{mix}%") for name, previous, mix in staff]
+    return SingleOriginReport(build_single_origin_dataframe(rows), store, "Single Origin Espresso Sales Report", date)
+
+
+def test_waste_rows_round_trip_and_sum_per_store(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    report = waste_report("Store A", "10/11/2025", ("Tuna Melt", 30, 10), ("Butter Croissant", 10, 10))
+
+    assert history.record_waste_report(report, "sha-a", path=db) == 2
+    totals = history.waste_totals(by="store", path=db)
+    assert totals.to_dict("records") == [
+        {"week": "2025-11-10", "store": "Store A", "sold": 40.0, "waste": 20.0, "waste_pct": 33.33},
+    ]
+    assert history.distinct("waste", "item", path=db) == ["Butter Croissant", "Tuna Melt"]
+    assert history.week_bounds("waste", path=db) == ("2025-11-10", "2025-11-10")
+
+
+def test_same_file_is_recorded_once(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    report = waste_report("Store A", "10/11/2025", ("Tuna Melt", 30, 10))
+
+    assert history.record_waste_report(report, "sha-a", path=db) == 1
+    assert history.record_waste_report(report, "sha-a", path=db) == 0
+    # Also once the in-process memo is gone, e.g. after a restart
+    history._recorded.clear()
+    assert history.record_waste_report(report, "sha-a", path=db) == 0
+
+
+def test_new_file_for_same_store_and_week_replaces_rows(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    history.record_waste_report(waste_report("Store A", "10/11/2025", ("Tuna Melt", 30, 10)), "v1", path=db)
+    history.record_waste_report(waste_report("Store A", "10/11/2025", ("Tuna Melt", 20, 20)), "v2", path=db)
+
+    totals = history.waste_totals(by="item", path=db)
+    assert totals[["item", "sold", "waste"]].to_dict("records") == [{"item": "Tuna Melt", "sold": 20.0, "waste": 20.0}]
+
+
+def test_undated_report_is_not_recorded(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    report = waste_report("Store A", None, ("Tuna Melt", 30, 10))
+    assert history.record_waste_report(report, "sha-a", path=db) == 0
+    assert history.week_bounds("waste", path=db) == (None, None)
+
+
+def test_single_origin_mix_is_averaged_per_week(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    history.record_single_origin_report(
+        single_origin_report("Store A", "03 Nov 2025", ("Alice", 5, 10), ("Bob", 5, 20)), "so-a", path=db
+    )
+    history.record_single_origin_report(
+        single_origin_report(None, "03 Nov 2025", ("Cara", 5, 30)), "so-b", path=db
+    )
+
+    by_store = history.single_origin_totals(by="store", path=db)
+    assert by_store.to_dict("records") == [
+        {"week": "2025-11-03", "store": "Store A", "mix_pct": 15.0},
+        {"week": "2025-11-03", "store": "Unknown", "mix_pct": 30.0},
+    ]
+    by_name = history.single_origin_totals(by="name", names=["Bob"], path=db)
+    assert by_name["mix_pct"].tolist() == [20.0]
@@ -0,0 +1,102 @@
+"""The background parse queue: deduplication, retries and the report cache."""
+import pytest
+
+from synthetic import single_origin_report_pdf, waste_report_pdf
+from waste_report import jobs, profiling
+from waste_report.cache import ReportCache
+from waste_report.jobs import JobQueue
+from waste_report.parser import ReportRejected
+
+SO_PDF = single_origin_report_pdf(rows_per_page=4, store_name="Store A")
+OTHER_SO_PDF = single_origin_report_pdf(rows_per_page=4, store_name="Store B")
+
+
+@pytest.fixture(autouse=True)
+def in_process(monkeypatch):
+    # Parse on the job threads rather than starting the spawn pool
+    monkeypatch.setenv("REPORT_WORKERS", "1")
+
+
+def finished(job):
+    assert job.wait(60)
+    return job
+
+
+def test_same_bytes_share_one_job_and_parse():
+    queue = JobQueue(workers=2, cache=ReportCache())
+    job = queue.submit("single_origin", SO_PDF)
+    assert queue.submit("single_origin", SO_PDF) is job
+
+    assert finished(job).status == "done"
+    assert queue.result(job).store_name == "Store A"
+    assert queue.submit("single_origin", SO_PDF) is job
+
+
+def test_rejected_file_is_not_parsed_again():
+    queue = JobQueue(workers=1, cache=ReportCache())
+    job = finished(queue.submit("single_origin", waste_report_pdf(1, 5)))
+
+    assert isinstance(job.error, ReportRejected)
+    assert not job.retryable
+    assert queue.submit("single_origin", waste_report_pdf(1, 5)) is job
+
+
+def test_other_failures_are_retried(monkeypatch):
+    parse = jobs.REPORT_KINDS["single_origin"]
+    calls = []
+
+    def flaky(report_format, data, progress):
+        calls.append(data)
+        if len(calls) == 1:
+            raise OSError("worker went away")
+        return parse(report_format, data, progress)
+
+    monkeypatch.setitem(jobs.REPORT_KINDS, "single_origin", flaky)
+    queue = JobQueue(workers=1, cache=ReportCache())
+    failed = finished(queue.submit("single_origin", SO_PDF))
+    assert failed.status == "failed" and failed.retryable
+
+    retried = finished(queue.submit("single_origin", SO_PDF))
+    assert retried is not failed
+    assert retried.status == "done" and len(calls) == 2
+
+
+def test_profiling_failure_fails_the_job_instead_of_hanging(monkeypatch):
+    def broken_start_run(name):
+        raise RuntimeError("profiler unavailable")
+
+    monkeypatch.setattr(profiling, "start_run", broken_start_run)
+    job = JobQueue(workers=1, cache=ReportCache()).submit("single_origin", SO_PDF)
+
+    assert job.wait(10)
+    assert job.status == "failed" and job.retryable
+
+
+def test_evicted_result_is_parsed_again():
+    queue = JobQueue(workers=1, cache=ReportCache(maxsize=1))
+    first = finished(queue.submit("single_origin", SO_PDF))
+    finished(queue.submit("single_origin", OTHER_SO_PDF))
+    assert queue.result(first) is None
+
+    again = finished(queue.submit("single_origin", SO_PDF))
+    assert again is not first
+    assert queue.result(again).store_name == "Store A"
+
+
+def test_gather_keeps_results_the_cache_has_dropped():
+    queue = JobQueue(workers=2, cache=ReportCache(maxsize=1))
+    collected = {}
+    uploads = [SO_PDF, OTHER_SO_PDF]
+    for _ in range(300):
+        parse_jobs, results = queue.gather("single_origin", uploads, collected)
+        if all(result is not None for result in results):
+            break
+        for job in parse_jobs:
+            job.wait(0.2)
+    assert [result.store_name for result in results] == ["Store A", "Store B"]
+    assert all(job.status == "done" for job in parse_jobs)
+
+    # A file no longer uploaded is dropped from the session's results
+    _, results = queue.gather("single_origin", [OTHER_SO_PDF], collected)
+    assert [result.store_name for result in results] == ["Store B"]
+    assert len(collected) == 1
@@ -0,0 +1,33 @@
+"""Column-wise waste row classification against the original per-cell helpers."""
+import pandas as pd
+import pytest
+
+from bench_parser import is_all_caps, is_numeric_row, is_valid_text
+from bench_rows import legacy_dataframe, synthetic_rows
+from waste_report.parser import build_waste_dataframe, waste_row_mask
+
+
+def legacy_keep(row):
+    """The page script's original checks for one raw table row."""
+    if not row or not row[0]:
+        return False
+    first_cell = str(row[0]).strip()
+    if is_all_caps(first_cell) or is_numeric_row(row):
+        return False
+    return is_valid_text(first_cell)
+
+
+@pytest.mark.parametrize("first", [
+    "Tuna Melt", "  Pain Au  Chocolat ", "BAKERY", "TOTAL 12", "1,234", "12.5", "", "   ", None,
+    "Café Latte", "ÉCLAIR", "3 Bean Salad", "--", "x",
+])
+def test_mask_matches_legacy_checks(first):
+    row = [first] + ["12"] * 10
+    assert waste_row_mask(pd.Series([first], dtype=object)).tolist() == [legacy_keep(row)]
+
+
+def test_frame_matches_legacy_frame():
+    rows = synthetic_rows(2_000, seed=3)
+    old = legacy_dataframe(rows)
+    new = build_waste_dataframe(rows)
+    assert new[old.columns].reset_index(drop=True).equals(old.reset_index(drop=True))
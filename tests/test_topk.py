@@ -0,0 +1,36 @@
+"""Streaming the top items per category instead of building the whole frame."""
+import math
+
+import pytest
+
+from synthetic import rows_per_page, waste_report_pdf
+from waste_report.charts import top_wasted
+from waste_report.parser import parse_waste_report, parse_waste_top_k
+from waste_report.topk import TopK, top_k_by_category
+
+
+def test_top_k_keeps_largest_first_and_earliest_on_ties():
+    top = TopK(3, key=lambda row: row[1])
+    for row in [("a", 5), ("b", 9), ("c", 5), ("d", math.nan), ("e", 1), ("f", 5)]:
+        top.push(row)
+    assert top.items() == [("b", 9), ("a", 5), ("c", 5)]
+
+
+def test_top_k_by_category_in_first_seen_order():
+    rows = [("x", 1, "pastries"), ("y", 3, "products"), ("z", 2, "pastries")]
+    tops = top_k_by_category(rows, 1, key=lambda row: row[1], category=lambda row: row[2])
+    assert list(tops) == ["pastries", "products"]
+    assert tops["pastries"] == [("z", 2, "pastries")]
+
+
+@pytest.mark.parametrize("k", [3, 10])
+def test_streamed_top_k_matches_the_full_frame(k):
+    pdf = waste_report_pdf(3, rows_per_page(120, 3))
+    full = parse_waste_report(pdf, workers=1)
+    streamed = parse_waste_top_k(pdf, k)
+
+    assert (streamed.store_name, streamed.date_range) == (full.store_name, full.date_range)
+    expected, actual = top_wasted(full.df, k), top_wasted(streamed.df, k)
+    assert list(actual) == list(expected)
+    for category in expected:
+        assert actual[category].reset_index(drop=True).equals(expected[category].reset_index(drop=True))
@@ -0,0 +1,113 @@
+import base64
+import logging
+import os
+import threading
+from io import BytesIO
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Backgrounds are shown behind a 75% white overlay, so a resized and
+# recompressed copy looks the same as the multi-MB originals.
+BG_MAX_WIDTH = int(os.getenv("REPORT_BG_MAX_WIDTH", 1600))
+BG_QUALITY = int(os.getenv("REPORT_BG_QUALITY", 70))
+
+# "inline" embeds the image in the CSS as base64. "static" writes it to
+# STATIC_DIR and links to it, so reruns only send a few hundred bytes and
+# the browser caches the image; this needs server.enableStaticServing.
+BG_MODE = os.getenv("REPORT_BG_MODE", "inline")
+STATIC_DIR = "static"
+
+_css_cache = {}
+_missing = set()
+_lock = threading.Lock()
+
+BG_CSS = """
+    <style>
+    .stApp {{
+        background: url("{url}") no-repeat center center fixed;
+        background-size: cover;
+        position: relative;
+    }}
+
+    .stApp::before {{
+        content: "";
+        position: absolute;
+        top: 0;
+        left: 0;
+        height: 100%;
+        width: 100%;
+        background: rgba(255, 255, 255, 0.75); /* White overlay with 75% opacity */
+        z-index: 0;
+    }}
+
+    .stApp > * {{
+        position: relative;
+        z-index: 1;
+    }}
+    </style>
+    """
+
+
+def downscale(image_bytes, max_width=BG_MAX_WIDTH, quality=BG_QUALITY):
+    """JPEG no wider than max_width; the original bytes if that would not be smaller."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_bytes
+    with Image.open(BytesIO(image_bytes)) as image:
+        image = image.convert("RGB")
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue() if buffer.tell() < len(image_bytes) else image_bytes
+
+
+def background_css(image_file, mode=None):
+    """
+    The background <style> block for an image, built once per file version:
+    cached on (path, mtime, size), so editing the asset picks up the new
+    image without a restart. Returns None when the file does not exist.
+    """
+    mode = mode or BG_MODE
+    try:
+        stat = os.stat(image_file)
+    except OSError:
+        return None
+    key = (image_file, mode, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        css = _css_cache.get(key)
+    if css is not None:
+        return css
+
+    with open(image_file, "rb") as f:
+        image_bytes = downscale(f.read())
+    if mode == "static":
+        name = f"bg-{os.path.splitext(os.path.basename(image_file))[0]}-{stat.st_mtime_ns}.jpg"
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with open(os.path.join(STATIC_DIR, name), "wb") as f:
+            f.write(image_bytes)
+        url = f"app/static/{name}"
+    else:
+        url = f"data:image/jpg;base64,{base64.b64encode(image_bytes).decode()}"
+    css = BG_CSS.format(url=url)
+
+    with _lock:
+        # Drop older versions of the same file
+        for old in [k for k in _css_cache if k[:2] == key[:2]]:
+            del _css_cache[old]
+        _css_cache[key] = css
+    return css
+
+
+def add_bg_from_local(image_file):
+    """Set the page background to a local image; a missing file just leaves the default background."""
+    css = background_css(image_file)
+    if css is None:
+        if image_file not in _missing:
+            _missing.add(image_file)
+            logger.warning("Background image %s not found", image_file)
+        return
+    st.markdown(css, unsafe_allow_html=True)
@@ -0,0 +1,5 @@
+"""
+Parsing, caching and chart code shared by the Streamlit pages and the
+headless command line (python -m waste_report). Submodules are imported
+explicitly so that loading the CLI stays cheap.
+"""
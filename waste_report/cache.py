@@ -0,0 +1,161 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from .profiling import span
+
+
+def content_hash(data):
+    """SHA-256 hex digest of the uploaded file bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ReportCache:
+    """
+    Two-level cache for parsed reports: an in-process LRU backed by an
+    optional pickle directory. The disk level is pruned by age and by total
+    size (least recently used files go first).
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None, max_bytes=200 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = self._disk_get(key) if self.cache_dir else None
+        if value is not None:
+            self._memory_set(key, value)
+        return value
+
+    def set(self, key, value):
+        self._memory_set(key, value)
+        if self.cache_dir:
+            self._disk_set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _memory_set(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            # Touch the file so size-based eviction sees it as recently used
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or stale entry (e.g. written by an older version)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _disk_set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Process-wide cache shared by the Streamlit pages. Set
+    REPORT_CACHE_DIR to also keep parsed reports on disk across restarts.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ReportCache(
+                maxsize=int(os.getenv("REPORT_CACHE_SIZE", 32)),
+                cache_dir=os.getenv("REPORT_CACHE_DIR") or None,
+                max_bytes=int(os.getenv("REPORT_CACHE_MAX_MB", 200)) * 1024 * 1024,
+                max_age=int(os.getenv("REPORT_CACHE_MAX_AGE_DAYS", 7)) * 24 * 3600,
+            )
+        return _default_cache
+
+
+def cached_parse(namespace, parse_fn, data, cache=None):
+    """
+    Return parse_fn(data), reusing a previous result for identical bytes.
+    The namespace keeps different report types from sharing entries.
+    """
+    cache = cache or get_default_cache()
+    with span("cache.lookup"):
+        key = f"{namespace}-{content_hash(data)}"
+        result = cache.get(key)
+    if result is None:
+        result = parse_fn(data)
+        cache.set(key, result)
+    return result
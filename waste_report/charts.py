@@ -0,0 +1,296 @@
+import hashlib
+import os
+from io import BytesIO
+from typing import NamedTuple, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # Charts are only ever rendered to files, never to a window
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.transforms import Bbox
+import numpy as np
+import pandas as pd
+
+from .cache import ReportCache
+from .parser import DEFAULT_CATEGORY, category_names
+from .profiling import span
+from .schema import waste_frame
+
+# Same resolution st.pyplot renders at
+PNG_DPI = 200
+
+# Rendered output keyed on the charted data, so reruns skip matplotlib
+_render_cache = ReportCache(maxsize=64)
+
+# Items per chart
+TOP_N = int(os.getenv("REPORT_TOP_N", 10))
+
+# Waste report pages are A4 portrait (inches): the chart above its top-N table
+PAGE_SIZE = (8.27, 11.69)
+# Chart axes (left is widened for long item names), table top, and the part of the page shown on screen
+CHART_BOTTOM, CHART_TOP, TABLE_TOP, SCREEN_BOTTOM = 0.5, 0.87, 0.42, 0.455
+
+# (y-axis label, bar colour) per category; other categories use the fallback
+CHART_STYLES = {"products": ("Product", "gray"), "pastries": ("Pastry Item", "lightgray")}
+FALLBACK_STYLE = ("Item", "silver")
+
+
+class WasteChart(NamedTuple):
+    """Everything that determines how one waste chart looks."""
+    kind: str
+    top: pd.DataFrame
+    title: str
+    ylabel: str
+    color: str
+
+
+class RenderedChart(NamedTuple):
+    kind: str
+    top: pd.DataFrame
+    png: Optional[bytes]
+
+
+class RenderedReport(NamedTuple):
+    """A whole report rendered once: the PDF plus one PNG per chart."""
+    pdf: bytes
+    sections: list
+
+
+def top_wasted(df, n=TOP_N):
+    """
+    {category: top n rows by Waste_pct} for every category present. Uses a
+    partial selection (nlargest) per category instead of sorting all rows.
+    """
+    with span("top10.sort"):
+        return {
+            category: group.nlargest(n, "Waste_pct", keep="first")
+            for category, group in df.groupby("Category", sort=False)
+        }
+
+
+def cross_store_ranking(reports, k=None):
+    """
+    Items from every parsed report ranked by Waste_pct across stores, built
+    on the compact waste_frame(). With k, only the top k are selected (a
+    partial selection, not a full sort), which also keeps what the page
+    sends to the browser small.
+    """
+    ranking = waste_frame(reports)[["Store", "Item", "Sold", "Waste", "Waste_pct"]]
+    if k is None:
+        ranking = ranking.sort_values(by="Waste_pct", ascending=False, kind="stable", ignore_index=True)
+    else:
+        ranking = ranking.nlargest(k, "Waste_pct", keep="first").reset_index(drop=True)
+    # Back to the two-decimal percentages the reports show
+    ranking["Waste_pct"] = ranking["Waste_pct"].astype("float64").round(2)
+    ranking.insert(0, "Rank", range(1, len(ranking) + 1))
+    return ranking
+
+
+def _waste_bars(ax, top, ylabel, color):
+    bars = ax.barh(top["Item"], top["Waste_pct"], color=color, edgecolor="black")
+    for bar in bars:
+        ax.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2, f"{bar.get_width():.1f}%", va='center')
+    ax.set_xlabel("Waste %")
+    ax.set_ylabel(ylabel)
+    ax.invert_yaxis()
+    ax.grid(True, linestyle="--", alpha=0.5)
+
+
+def draw_waste_page(fig, spec):
+    """
+    One WasteChart as an A4 page: the bar chart above a table of its items.
+    Margins are fixed rather than fitted with tight_layout, which would lay
+    every label out twice.
+    """
+    top = spec.top
+    fig.text(0.5, 0.975, spec.title, ha="center", va="top", fontsize=14)
+    longest = max([len(item) for item in top["Item"]] + [4])
+    left = min(0.45, (0.55 + 0.075 * longest) / PAGE_SIZE[0])
+    ax = fig.add_axes([left, CHART_BOTTOM, 0.95 - left, CHART_TOP - CHART_BOTTOM])
+    _waste_bars(ax, top, spec.ylabel, spec.color)
+    # Room for the percentage labels past the longest bar
+    ax.set_xlim(0, max(top["Waste_pct"].max() * 1.15 if len(top) else 0, 1))
+
+    # One text block per column instead of a cell per value
+    columns = [
+        ("Item", top["Item"].tolist(), 0.06, "left"),
+        ("Sold", [f"{value:g}" for value in top["Sold"]], 0.70, "right"),
+        ("Waste", [f"{value:g}" for value in top["Waste"]], 0.82, "right"),
+        ("Waste %", [f"{value:.2f}" for value in top["Waste_pct"]], 0.94, "right"),
+    ]
+    for heading, values, x, align in columns:
+        fig.text(x, TABLE_TOP, "\n".join([heading] + values), ha=align, va="top", fontsize=10, linespacing=1.8)
+    fig.add_artist(Line2D([0.06, 0.94], [TABLE_TOP - 0.016] * 2, color="black", linewidth=0.8))
+
+
+def waste_chart_specs(report, n=TOP_N):
+    """The products chart and one chart per other category that has items, for one store."""
+    df, store_name, clean_date = report
+    tops = top_wasted(df, n)
+    label = f"{store_name or ''}\n{clean_date[1] or ''} – {clean_date[0] or ''}"
+
+    specs = []
+    for category in category_names():
+        top = tops.get(category, df.iloc[:0])
+        if category != DEFAULT_CATEGORY and top.empty:
+            continue
+        ylabel, color = CHART_STYLES.get(category, FALLBACK_STYLE)
+        specs.append(WasteChart(category, top, f"Top {n} Most Wasted {category.title()}\n{label}", ylabel, color))
+    return specs
+
+
+def draw_single_origin_page(fig, spec):
+    """
+    Grouped Previous Week / Last Week / Improvement bars per team member,
+    drawn onto a 9 x 5 figure; spec is (kind, df_sorted, store_name, date).
+    """
+    _, df_sorted, store_name, date = spec
+    names = df_sorted["Name"]
+    wraped_names = [name.replace(" ", "\n") if len(name) > 12 else name for name in names]
+
+    gap = 0.6  # space between groups
+    x = np.arange(len(names)) * (1 + gap)
+    width = 0.2
+
+    ax = fig.add_subplot()
+    # Bars
+    ax.bar(x - width, df_sorted["Previous Week"], width, label="Previous Week", color="lightgray", edgecolor="black")
+    ax.bar(x, df_sorted["Mix % Last"], width, label="Last Week", color="darkgray", edgecolor="black")
+    ax.bar(x + width, df_sorted["Improvement"], width, label="Improvement", color="green", edgecolor="black")
+
+    # Labels and styling
+    ax.set_ylabel("Mix %")
+    ax.set_title(f"Mix % Comparison by Team Member - {store_name} - {date}")
+    ax.set_xticks(x)
+    ax.set_xticklabels(wraped_names, fontsize=9, fontfamily='monospace')
+    ax.legend()
+    ax.grid(True, linestyle="--", axis="y", alpha=0.5)
+    fig.tight_layout()
+
+
+def _data_key(*parts):
+    """Stable digest of the frames and labels a rendering depends on."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(",".join(map(str, part.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+class ReportWriter:
+    """
+    A PDF streamed to out (a path or binary file) one page at a time. Every
+    page is drawn on the same figure, cleared in between, and written out
+    as soon as it is drawn, so memory stays flat however many stores the
+    report covers, and the glyphs used are embedded once for the whole
+    file. The figure is not registered with pyplot, and no matplotlib
+    rcParams are changed, so writers on other threads don't interfere.
+
+        with ReportWriter("report.pdf") as writer:
+            for spec in specs:
+                writer.add_page(draw_waste_page, spec)
+    """
+
+    def __init__(self, out, figsize=PAGE_SIZE):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.pages = 0
+        self._pdf = PdfPages(out)
+
+    def add_page(self, draw, *args):
+        """Clear the figure, draw(figure, *args) onto it and write it as the next page."""
+        self.figure.clear()
+        with span("chart.render"):
+            draw(self.figure, *args)
+        with span("pdf.assemble"):
+            self._pdf.savefig(self.figure)
+        self.pages += 1
+
+    def png(self, bbox_inches="tight"):
+        """The page just added as PNG bytes, cropped to bbox_inches (a Bbox in inches, or "tight")."""
+        with span("chart.png"):
+            buffer = BytesIO()
+            self.figure.savefig(buffer, format="png", dpi=PNG_DPI, bbox_inches=bbox_inches)
+            return buffer.getvalue()
+
+    def close(self):
+        self._pdf.close()
+        self.figure.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _render(sections, draw, png, figsize=PAGE_SIZE, png_region="tight"):
+    """
+    Draw every chart exactly once, writing it to the shared PDF and, when
+    png is set, to PNG bytes (cut to png_region) for on-screen display.
+    """
+    pdf_buffer = BytesIO()
+    rendered = []
+    with ReportWriter(pdf_buffer, figsize) as writer:
+        for section in sections:
+            charts = []
+            for spec in section:
+                writer.add_page(draw, spec)
+                charts.append(RenderedChart(spec[0], spec[1], writer.png(png_region) if png else None))
+            rendered.append(charts)
+    return RenderedReport(pdf_buffer.getvalue(), rendered)
+
+
+def _cached_render(key, sections, draw, png, **options):
+    rendered = _render_cache.get(key)
+    if rendered is None:
+        rendered = _render(sections, draw, png, **options)
+        _render_cache.set(key, rendered)
+    return rendered
+
+
+# The title and chart of a waste page, without the table the page shows separately
+_WASTE_SCREEN_REGION = Bbox([[0, SCREEN_BOTTOM * PAGE_SIZE[1]], PAGE_SIZE])
+
+
+def render_waste_report(reports, n=TOP_N, png=True):
+    """
+    Render the waste pages of one or more stores into a single PDF, one
+    section per store, plus PNGs of the charts for the page. Cached on the
+    top-n data and labels, so a rerun with unchanged data does no
+    matplotlib work.
+    """
+    sections = [waste_chart_specs(report, n) for report in reports]
+    key = _data_key("waste", png, *[part for section in sections for spec in section for part in spec])
+    return _cached_render(key, sections, draw_waste_page, png, png_region=_WASTE_SCREEN_REGION)
+
+
+def write_waste_report(reports, out, n=TOP_N):
+    """
+    Stream the waste pages of any number of stores straight to out (a path
+    or binary file), without the render cache or PNGs; returns the page
+    count. Only one store's data is charted at a time.
+    """
+    with ReportWriter(out) as writer:
+        for report in reports:
+            for spec in waste_chart_specs(report, n):
+                writer.add_page(draw_waste_page, spec)
+    return writer.pages
+
+
+def render_single_origin(reports, png=True):
+    """
+    Render one Mix % chart per (df, store_name, date) into a single PDF,
+    plus PNGs for the page. Cached like render_waste_report().
+    """
+    sections = [
+        [("single_origin", df.sort_values(by="Mix % Last", ascending=False), store_name, date)]
+        for df, store_name, date in reports
+    ]
+    key = _data_key("single_origin", png, *[part for section in sections for spec in section for part in spec])
+    return _cached_render(key, sections, draw_single_origin_page, png, figsize=(9, 5))
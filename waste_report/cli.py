@@ -0,0 +1,121 @@
+"""
+Headless entry point for running reports in bulk, e.g. from cron.
+
+    python -m waste_report waste <dir> --out report.pdf [--csv ranking.csv]
+    python -m waste_report single-origin <dir> --out so.pdf [--csv staff.csv]
+
+Heavy dependencies (pdfplumber, pandas, matplotlib) are imported inside the
+commands and Streamlit is never imported, so start-up stays cheap; check
+with `python -X importtime -m waste_report --help`.
+"""
+import argparse
+import os
+import sys
+
+
+def _read_pdfs(directory):
+    """(file name, bytes) for every PDF directly inside directory, sorted by name."""
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(".pdf"))
+    pdfs = []
+    for name in names:
+        with open(os.path.join(directory, name), "rb") as f:
+            pdfs.append((name, f.read()))
+    return pdfs
+
+
+def _usable_reports(files, results):
+    """Drop files that failed to parse or had no data, reporting them on stderr."""
+    reports = []
+    for (name, _), result in zip(files, results):
+        if isinstance(result, Exception):
+            print(f"{name}: {result}", file=sys.stderr)
+        elif result.df.empty:
+            print(f"{name}: no valid data found", file=sys.stderr)
+        else:
+            reports.append(result)
+    return reports
+
+
+def run_waste(args):
+    from .charts import TOP_N, cross_store_ranking, write_waste_report
+    from .formats import parse_reports_cached, parse_waste_top_k_cached
+
+    # Read here rather than as the argparse default, so --help doesn't import the charts
+    top = args.top or TOP_N
+    files = _read_pdfs(args.directory)
+    pdfs = [data for _, data in files]
+    if args.csv:
+        # The ranking needs every row
+        results = parse_reports_cached("waste", pdfs, workers=args.workers, return_exceptions=True)
+    else:
+        # The charts only need the top items, so no store's full frame is built
+        results = parse_waste_top_k_cached(pdfs, top, workers=args.workers, return_exceptions=True)
+    reports = _usable_reports(files, results)
+    if not reports:
+        print(f"No waste reports found in {args.directory}", file=sys.stderr)
+        return 1
+
+    # Pages go to disk as they are drawn rather than being built up in memory
+    write_waste_report(reports, args.out, n=top)
+
+    if args.csv:
+        cross_store_ranking(reports).to_csv(args.csv, index=False)
+    print(f"Wrote {args.out} ({len(reports)} of {len(files)} reports)")
+    return 0
+
+
+def run_single_origin(args):
+    import pandas as pd
+
+    from .charts import render_single_origin
+    from .formats import parse_reports_cached
+
+    files = _read_pdfs(args.directory)
+    results = parse_reports_cached(
+        "single_origin", [data for _, data in files], workers=args.workers, return_exceptions=True
+    )
+    reports = _usable_reports(files, results)
+    if not reports:
+        print(f"No Single Origin reports found in {args.directory}", file=sys.stderr)
+        return 1
+
+    rendered = render_single_origin([(df, store_name, date) for df, store_name, _, date in reports], png=False)
+    with open(args.out, "wb") as f:
+        f.write(rendered.pdf)
+
+    if args.csv:
+        staff = pd.concat(
+            [df.assign(Store=store_name, Date=date) for df, store_name, _, date in reports],
+            ignore_index=True,
+        )
+        staff[["Store", "Date", "Name", "Previous Week", "Mix % Last", "Improvement"]].to_csv(args.csv, index=False)
+    print(f"Wrote {args.out} ({len(reports)} of {len(files)} reports)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="waste_report", description="Run the waste and Single Origin reports without Streamlit."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    waste = commands.add_parser("waste", help="Top wasted items for a folder of 4 Weekly Food Sales PDFs")
+    waste.add_argument("directory")
+    waste.add_argument("--out", default="waste_report.pdf", help="PDF with a chart section per store")
+    waste.add_argument("--csv", help="Also write the cross-store Waste_pct ranking here")
+    waste.add_argument("--top", type=int, help="Items per chart (default REPORT_TOP_N or 10)")
+    waste.add_argument("--workers", type=int, help="Parser processes (default REPORT_WORKERS or CPU count)")
+    waste.set_defaults(func=run_waste)
+
+    single_origin = commands.add_parser("single-origin", help="Staff Mix %% charts for a folder of Single Origin PDFs")
+    single_origin.add_argument("directory")
+    single_origin.add_argument("--out", default="SO_report.pdf", help="PDF with one chart per report")
+    single_origin.add_argument("--csv", help="Also write every report's staff rows here")
+    single_origin.add_argument("--workers", type=int, help="Parser processes (default REPORT_WORKERS or CPU count)")
+    single_origin.set_defaults(func=run_single_origin)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
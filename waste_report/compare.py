@@ -0,0 +1,93 @@
+"""
+Single Origin reports compared across weeks and stores.
+
+Staff are joined across reports on a normalised name (case, spacing and
+punctuation ignored) and pivoted into a staff x week matrix of Mix % Last.
+Rolling averages, ranks and rank changes are then computed on the whole
+matrix at once rather than per staff member.
+"""
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .schema import single_origin_frame
+
+ROLLING_WEEKS = int(os.getenv("REPORT_ROLLING_WEEKS", 4))
+
+
+class StaffComparison(NamedTuple):
+    """Staff x week matrices (rows: staff display names, columns: week ending dates)."""
+    mix: pd.DataFrame
+    rolling: pd.DataFrame
+    rank: pd.DataFrame
+    rank_change: pd.DataFrame
+    summary: pd.DataFrame
+
+
+def normalise_names(names):
+    """Join keys for staff names: casefolded, punctuation dropped, whitespace collapsed."""
+    return (
+        pd.Series(names, dtype=object).fillna("").astype(str).str.casefold()
+        .str.replace(r"[^\w\s]", "", regex=True)
+        .str.split().str.join(" ")
+    )
+
+
+def _staff_column(names):
+    """Categorical of normalised names, normalising each distinct name once."""
+    keys = normalise_names(names.cat.categories)
+    key_codes, key_names = pd.factorize(keys)
+    codes = np.where(names.cat.codes >= 0, key_codes[names.cat.codes], -1)
+    return pd.Categorical.from_codes(codes, categories=key_names)
+
+
+def _latest(matrix):
+    """Each row's value in the last week it has one."""
+    return matrix.ffill(axis=1).iloc[:, -1] if matrix.shape[1] else pd.Series(np.nan, index=matrix.index)
+
+
+def compare_staff(reports, window=ROLLING_WEEKS):
+    """
+    Compare SingleOriginReports from any number of weeks and stores. Reports
+    without a readable date are left out. A name that appears twice in one
+    week (two stores) gets the mean of its Mix %. rolling is the mean over
+    the last `window` weeks reported; rank is 1 for the highest Mix % in a
+    week, and rank_change the places gained since the previous week ranked.
+    """
+    frame = single_origin_frame(reports)
+    frame = frame[frame["Week"].notna()].copy()
+    frame["Staff"] = _staff_column(frame["Name"])
+
+    mix = frame.pivot_table(index="Staff", columns="Week", values="Mix % Last", aggfunc="mean", observed=True)
+    # Back to float64, without the float32 noise (Mix % has at most two decimals)
+    mix = mix.astype(np.float64).round(2)
+    rolling = mix.T.rolling(window, min_periods=1).mean().T
+    rank = mix.rank(ascending=False, method="min")
+    rank_change = rank.ffill(axis=1).shift(1, axis=1) - rank
+
+    # Show each person under the spelling from their latest report
+    latest = frame.sort_values("Week", kind="stable").drop_duplicates("Staff", keep="last")
+    display = pd.Series(latest["Name"].astype(str).to_numpy(), index=latest["Staff"].astype(str).to_numpy())
+    stores = (
+        frame[["Staff", "Store"]].drop_duplicates().astype(str).sort_values("Store")
+        .groupby("Staff")["Store"].agg(", ".join)
+    )
+    keys = mix.index.astype(str)
+    summary = pd.DataFrame({
+        "Name": display.reindex(keys).to_numpy(),
+        "Stores": stores.reindex(keys).to_numpy(),
+        "Weeks": mix.notna().sum(axis=1).to_numpy(),
+        "Latest Mix %": _latest(mix).to_numpy(),
+        f"Rolling {window}-week Mix %": _latest(rolling).round(2).to_numpy(),
+        "Rank": _latest(rank).astype("Int64").array,
+        "Rank change": _latest(rank_change).astype("Int64").array,
+    })
+    summary = summary.sort_values(f"Rolling {window}-week Mix %", ascending=False, kind="stable").reset_index(drop=True)
+
+    names = pd.Index(display.reindex(keys).to_numpy(), name="Name")
+    weeks = mix.columns.rename("Week")
+    for matrix in (mix, rolling, rank, rank_change):
+        matrix.index, matrix.columns = names, weeks
+    return StaffComparison(mix, rolling.round(2), rank.astype("Int64"), rank_change.astype("Int64"), summary)
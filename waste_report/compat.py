@@ -0,0 +1,7 @@
+"""Imports that differ between the Python versions the app supports."""
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+__all__ = ["tomllib"]
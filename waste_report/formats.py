@@ -0,0 +1,157 @@
+"""
+Registry of the report layouts the app can read.
+
+Each ReportFormat pairs a layout (see parser.WasteLayout and
+parser.SingleOriginLayout) with the parser that takes it. The layout's
+signature is checked against the PDF metadata title first. A title that
+only one format claims settles it; otherwise the text in the top strip of
+the first page decides, so recognising an upload never lays out a whole
+page. When the POS vendor changes a column, register the new version ahead
+of the old one, with a header phrase only the new version has:
+
+    register(ReportFormat(
+        "waste-2026", "waste", "4 Weekly Food Sales report",
+        WasteLayout(header=("Store Name", "Waste Qty"), sold=10, waste=12), parse_waste_report,
+    ), first=True)
+
+Both versions keep the "Food Sales" title, so an old report is told apart
+by its header lacking "Waste Qty".
+
+Parsers are called as parse(pdf_bytes, layout=..., **options) and must be
+module-level functions so they can run in the process pool.
+"""
+import hashlib
+from functools import partial
+from io import BytesIO
+from typing import Callable, NamedTuple
+
+import pdfplumber
+
+from .cache import cached_parse
+from .parser import (
+    SINGLE_ORIGIN_LAYOUT, WASTE_LAYOUT, ReportRejected, matches_signature, page_header_text, parse_many,
+    parse_single_origin_report, parse_waste_report, parse_waste_top_k, waste_namespace,
+)
+from .profiling import span
+
+
+class ReportFormat(NamedTuple):
+    """One registered layout: kind is the page it belongs on ("waste" or "single_origin")."""
+    name: str
+    kind: str
+    label: str
+    layout: NamedTuple
+    parse: Callable
+
+
+FORMATS = []
+
+
+def register(report_format, first=False):
+    """Add a layout; first=True tries it before those already registered."""
+    if any(existing.name == report_format.name for existing in FORMATS):
+        raise ValueError(f"Report format {report_format.name!r} is already registered")
+    FORMATS.insert(0 if first else len(FORMATS), report_format)
+    return report_format
+
+
+register(ReportFormat(
+    "single_origin", "single_origin", "Single Origin report", SINGLE_ORIGIN_LAYOUT, parse_single_origin_report
+))
+register(ReportFormat("waste", "waste", "4 Weekly Food Sales report", WASTE_LAYOUT, parse_waste_report))
+
+
+def formats(kind=None):
+    """Registered formats in the order they are tried, optionally of one kind."""
+    return [report_format for report_format in FORMATS if kind is None or report_format.kind == kind]
+
+
+def signature():
+    """Short hash of every registered layout, so cached results from other layouts are not reused."""
+    layouts = repr([(report_format.name, tuple(report_format.layout)) for report_format in FORMATS])
+    return hashlib.sha256(layouts.encode()).hexdigest()[:8]
+
+
+def cache_namespace(kind):
+    """Cache namespace for routed reports of a kind."""
+    base = waste_namespace() if kind == "waste" else kind
+    return f"{base}-{signature()}"
+
+
+def detect(pdf_bytes, registered=None):
+    """
+    The registered format a PDF matches, or None. When several formats
+    share its title (versions of one report), the first of them whose
+    header phrases are all on the page wins, falling back to the oldest.
+    """
+    registered = registered or FORMATS
+    with span("format.detect"), pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        title = pdf.metadata.get("Title")
+        title = title if isinstance(title, str) else ""
+        candidates = [
+            report_format for report_format in registered if matches_signature(report_format.layout, title, "")
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+        header = page_header_text(pdf.pages[0]) if pdf.pages else ""
+        for report_format in candidates or registered:
+            if matches_signature(report_format.layout, "", header):
+                return report_format
+    return candidates[-1] if candidates else None
+
+
+def route(pdf_bytes, kind, registered=None):
+    """
+    The format to parse an upload of this kind with. A report recognised
+    as another kind raises ReportRejected; one matching no signature falls back
+    to the kind's oldest layout, whose parser does its own checks.
+    """
+    registered = registered or FORMATS
+    oldest = [report_format for report_format in registered if report_format.kind == kind][-1]
+    report_format = detect(pdf_bytes, registered)
+    if report_format is None:
+        return oldest
+    if report_format.kind != kind:
+        raise ReportRejected(f"This PDF looks like a {report_format.label}, not a {oldest.label}.")
+    return report_format
+
+
+def _parse_routed(kind, registered, pdf_bytes, **options):
+    # Pool workers only know the formats registered at import, so the caller's list is passed in
+    report_format = route(pdf_bytes, kind, registered)
+    return report_format.parse(pdf_bytes, layout=report_format.layout, **options)
+
+
+def parse_reports_cached(kind, pdf_bytes_list, workers=None, return_exceptions=False):
+    """Route and parse a batch of reports of one kind concurrently, in upload order."""
+    namespace, registered = cache_namespace(kind), tuple(FORMATS)
+    if kind == "waste" and len(pdf_bytes_list) == 1:
+        # A lone report is better served by splitting its pages across the pool
+        try:
+            return [cached_parse(namespace, partial(_parse_routed, kind, registered), pdf_bytes_list[0])]
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return [e]
+    # Each file already has a pool worker to itself; don't nest pools
+    options = {"workers": 1} if kind == "waste" else {}
+    parse = partial(_parse_routed, kind, registered, **options)
+    return parse_many(namespace, parse, pdf_bytes_list, workers, return_exceptions)
+
+
+def _parse_routed_top_k(registered, k, pdf_bytes):
+    report_format = route(pdf_bytes, "waste", registered)
+    if report_format.parse is not parse_waste_report:
+        # A parser of its own has no streaming version; charts take its top k anyway
+        return report_format.parse(pdf_bytes, layout=report_format.layout, workers=1)
+    return parse_waste_top_k(pdf_bytes, k, layout=report_format.layout)
+
+
+def parse_waste_top_k_cached(pdf_bytes_list, k, workers=None, return_exceptions=False):
+    """
+    parse_reports_cached("waste", ...) for callers that only chart the
+    reports: each df holds just the top k rows per category (see
+    parser.parse_waste_top_k), cached apart from the full frames.
+    """
+    parse = partial(_parse_routed_top_k, tuple(FORMATS), k)
+    return parse_many(f"{cache_namespace('waste')}-top{k}", parse, pdf_bytes_list, workers, return_exceptions)
@@ -0,0 +1,191 @@
+"""
+Local SQLite history of every parsed report, so trends across weeks and
+stores are a single indexed query instead of re-parsing old PDFs.
+
+The database lives at REPORT_HISTORY_DB (default report_history.sqlite in
+the working directory). Re-importing the same file is a no-op, and
+re-importing a report for the same store and week replaces its rows.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from .profiling import span
+from .schema import to_week
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    sha256 TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    store TEXT,
+    week TEXT,
+    imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS waste (
+    store TEXT NOT NULL,
+    week TEXT NOT NULL,
+    item TEXT NOT NULL,
+    is_pastry INTEGER NOT NULL,
+    sold REAL,
+    waste REAL,
+    waste_pct REAL,
+    PRIMARY KEY (store, week, item)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS waste_item_week ON waste (item, week);
+CREATE INDEX IF NOT EXISTS waste_week ON waste (week);
+CREATE TABLE IF NOT EXISTS single_origin (
+    store TEXT NOT NULL,
+    week TEXT NOT NULL,
+    name TEXT NOT NULL,
+    previous_week REAL,
+    mix_pct REAL,
+    PRIMARY KEY (store, week, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS single_origin_name_week ON single_origin (name, week);
+CREATE INDEX IF NOT EXISTS single_origin_week ON single_origin (week);
+"""
+
+_initialised = set()
+_recorded = set()
+_lock = threading.Lock()
+
+
+def history_path():
+    return os.getenv("REPORT_HISTORY_DB", "report_history.sqlite")
+
+
+def connect(path=None):
+    """Open the history database, creating the schema on first use."""
+    path = path or history_path()
+    conn = sqlite3.connect(path, timeout=30)
+    with _lock:
+        if path not in _initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _initialised.add(path)
+    return conn
+
+
+def _already_recorded(conn, path, sha256):
+    if conn.execute("SELECT 1 FROM imports WHERE sha256 = ?", (sha256,)).fetchone():
+        _recorded.add((path, sha256))
+        return True
+    return False
+
+
+def record_waste_report(report, sha256, path=None):
+    """
+    Store a parsed waste report, keyed on the last week of its date range.
+    Returns the number of item rows written (0 if already imported or the
+    report has no usable date).
+    """
+    df, store_name, clean_date = report
+    week = to_week(clean_date[0])
+    path = path or history_path()
+    if (path, sha256) in _recorded:
+        return 0
+    with span("history.record"), closing(connect(path)) as conn, conn:
+        if _already_recorded(conn, path, sha256) or week is None or df.empty:
+            return 0
+        store = store_name or "Unknown"
+        rows = list(zip(
+            [store] * len(df), [week] * len(df), df["Item"], df["is_pastry"].astype(int),
+            df["Sold"].astype(float), df["Waste"].astype(float), df["Waste_pct"].astype(float),
+        ))
+        conn.executemany("INSERT OR REPLACE INTO waste VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.execute(
+            "INSERT INTO imports (sha256, kind, store, week) VALUES (?, 'waste', ?, ?)", (sha256, store, week)
+        )
+    _recorded.add((path, sha256))
+    return len(rows)
+
+
+def record_single_origin_report(report, sha256, path=None):
+    """Store a parsed Single Origin report. Returns the number of staff rows written."""
+    df, store_name, _, date = report
+    week = to_week(date)
+    path = path or history_path()
+    if (path, sha256) in _recorded:
+        return 0
+    with span("history.record"), closing(connect(path)) as conn, conn:
+        if _already_recorded(conn, path, sha256) or week is None or df.empty:
+            return 0
+        store = store_name or "Unknown"
+        rows = list(zip(
+            [store] * len(df), [week] * len(df), df["Name"],
+            df["Previous Week"].astype(float), df["Mix % Last"].astype(float),
+        ))
+        conn.executemany("INSERT OR REPLACE INTO single_origin VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute(
+            "INSERT INTO imports (sha256, kind, store, week) VALUES (?, 'single_origin', ?, ?)",
+            (sha256, store, week),
+        )
+    _recorded.add((path, sha256))
+    return len(rows)
+
+
+def _where(filters, start, end):
+    """WHERE clause and parameters for column IN (...) filters and a week range."""
+    clauses, params = [], []
+    for column, values in filters.items():
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if start:
+        clauses.append("week >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append("week <= ?")
+        params.append(str(end))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def waste_totals(by="store", stores=None, items=None, start=None, end=None, path=None):
+    """
+    Waste % per week and store (or item), recomputed from summed quantities
+    inside SQLite so a year of every store never leaves the database.
+    """
+    if by not in ("store", "item"):
+        raise ValueError(f"Cannot group waste history by {by!r}")
+    where, params = _where({"store": stores, "item": items}, start, end)
+    query = (
+        f"SELECT week, {by}, SUM(sold) AS sold, SUM(waste) AS waste, "
+        f"ROUND(SUM(waste) * 100.0 / NULLIF(SUM(sold) + SUM(waste), 0), 2) AS waste_pct "
+        f"FROM waste{where} GROUP BY week, {by} ORDER BY week, {by}"
+    )
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def single_origin_totals(by="store", stores=None, names=None, start=None, end=None, path=None):
+    """Average Single Origin mix % per week and store (or staff member), grouped in SQLite."""
+    if by not in ("store", "name"):
+        raise ValueError(f"Cannot group Single Origin history by {by!r}")
+    where, params = _where({"store": stores, "name": names}, start, end)
+    query = (
+        f"SELECT week, {by}, ROUND(AVG(mix_pct), 2) AS mix_pct "
+        f"FROM single_origin{where} GROUP BY week, {by} ORDER BY week, {by}"
+    )
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def distinct(table, column, stores=None, path=None):
+    """Sorted distinct values of one column, optionally limited to some stores."""
+    if table not in ("waste", "single_origin") or column not in ("store", "item", "name"):
+        raise ValueError(f"Unknown history column {table}.{column}")
+    where, params = _where({"store": stores}, None, None)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(f"SELECT DISTINCT {column} FROM {table}{where} ORDER BY {column}", params)
+        return [value for (value,) in rows]
+
+
+def week_bounds(table, path=None):
+    """(first_week, last_week) stored in a table, or (None, None) when empty."""
+    if table not in ("waste", "single_origin"):
+        raise ValueError(f"Unknown history table {table}")
+    with closing(connect(path)) as conn:
+        return conn.execute(f"SELECT MIN(week), MAX(week) FROM {table}").fetchone()
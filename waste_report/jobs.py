@@ -0,0 +1,223 @@
+"""
+Background parsing jobs, so a large upload never blocks the Streamlit
+script that submitted it.
+
+Each upload becomes a Job keyed on its report kind and content hash: the
+same file submitted again (by the same or another session) gets the job
+already running or finished instead of a second parse. Jobs run on a small
+thread pool; the page scanning itself goes to the shared process pool, so
+several sessions' parses run side by side rather than behind one another.
+A job only holds its status: results go into the report cache under the
+job ID, and gather() hands them to the session that uploaded the files.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import content_hash, get_default_cache
+from .formats import cache_namespace, route
+from .parser import ReportRejected, default_workers, get_executor
+from .profiling import profiled_run
+
+
+def _parse_waste(report_format, data, progress):
+    # Even short reports go to the process pool so concurrent jobs don't share one GIL
+    return report_format.parse(data, layout=report_format.layout, progress=progress, min_pages=1)
+
+
+def _parse_single_origin(report_format, data, progress):
+    # Short reports, often uploaded by the hundred: one report per pool worker
+    workers = default_workers()
+    if workers <= 1:
+        return report_format.parse(data, layout=report_format.layout, progress=progress)
+    return get_executor(workers).submit(report_format.parse, data, layout=report_format.layout).result()
+
+
+REPORT_KINDS = {"waste": _parse_waste, "single_origin": _parse_single_origin}
+
+
+class Job:
+    """
+    One parse: queued, running, done or failed, with page progress. The
+    result of a done job is in the report cache under job_id.
+    """
+
+    def __init__(self, job_id, kind):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = "queued"
+        self.pages_done = 0
+        self.pages_total = None
+        self.error = None
+        # Profiled stages of the parse (REPORT_PROFILE=1), recorded on the job's thread
+        self.run = None
+        self.submitted = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def retryable(self):
+        """
+        Whether submitting the same bytes again should parse them again. A file
+        the parser rejected (ReportRejected) is rejected the same way every
+        time; anything else, such as a dead pool worker, MemoryError or a
+        profiler that would not start, may not happen twice.
+        """
+        return self.status == "failed" and not isinstance(self.error, ReportRejected)
+
+    @property
+    def fraction(self):
+        if self.finished:
+            return 1.0
+        return self.pages_done / self.pages_total if self.pages_total else 0.0
+
+    def describe(self):
+        if self.status == "running" and self.pages_total:
+            return f"page {self.pages_done} of {self.pages_total}"
+        return self.status
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns whether it did."""
+        return self._done.wait(timeout)
+
+    def _progress(self, pages_done, pages_total):
+        self.pages_done, self.pages_total = pages_done, pages_total
+
+    def _finish(self, error=None):
+        self.error = error
+        self.status = "failed" if error is not None else "done"
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class JobQueue:
+    """Runs parse jobs on background threads and keeps them by job ID."""
+
+    def __init__(self, workers=None, max_jobs=1024, cache=None):
+        self.max_jobs = max_jobs
+        self.cache = cache or get_default_cache()
+        self._executor = ThreadPoolExecutor(max_workers=workers or default_workers(), thread_name_prefix="report-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def job_id(self, kind, data):
+        """The job (and report cache) key for parsing data as this kind of report."""
+        return f"{cache_namespace(kind)}-{content_hash(data)}"
+
+    def submit(self, kind, data):
+        """Queue a parse of data, or return the existing job for the same content."""
+        parse = REPORT_KINDS[kind]
+        job_id = self.job_id(kind, data)
+        evicted = self._evicted(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.retryable and job is not evicted:
+                self._jobs.move_to_end(job_id)
+                return job
+            job = Job(job_id, kind)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._evict()
+        if self.cache.get(job_id) is not None:
+            job._finish()
+        else:
+            self._executor.submit(self._run, job, parse, data)
+        return job
+
+    def result(self, job):
+        """The parsed report of a done job, or None (also once it has left the report cache)."""
+        return self.cache.get(job.job_id) if job.status == "done" else None
+
+    def gather(self, kind, uploads, collected):
+        """
+        Submit every upload not yet in collected and move finished results
+        into it. collected is a {job_id: result} dict the caller keeps
+        between calls (the pages keep one per session), so results are held
+        by the sessions showing them rather than by the queue. Each is read
+        out of the report cache as soon as it is ready, so a batch larger
+        than the cache is not evicted before it is shown. Entries for files
+        no longer uploaded are dropped. Returns (jobs, results) in upload
+        order; a result is None until its job is done.
+        """
+        jobs, job_ids = [], []
+        for data in uploads:
+            job_id = self.job_id(kind, data)
+            if job_id in collected:
+                job = self.job(job_id)
+                # The queue may have dropped it, or be parsing it again for another session
+                if job is None or job.status != "done":
+                    job = Job(job_id, kind)
+                    job._finish()
+            else:
+                job = self.submit(kind, data)
+                result = self.result(job)
+                if result is not None:
+                    collected[job_id] = result
+                elif job.status == "done":
+                    # Evicted between submit() and now; parse it again
+                    job = self.submit(kind, data)
+            jobs.append(job)
+            job_ids.append(job_id)
+        for job_id in set(collected) - set(job_ids):
+            del collected[job_id]
+        return jobs, [collected.get(job_id) for job_id in job_ids]
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _evicted(self, job_id):
+        # A done job whose result has since left the report cache, so has to be parsed again
+        job = self.job(job_id)
+        if job is not None and job.status == "done" and self.cache.get(job_id) is None:
+            return job
+        return None
+
+    def _evict(self):
+        # Only finished jobs are dropped; their results stay in the report cache
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, parse, data):
+        job.status = "running"
+        # Anything raised here, profiling included, has to finish the job: the
+        # executor's future would swallow it and leave the job running forever
+        try:
+            # Spans belong to the thread's own run, so the parse gets one of its own
+            with profiled_run(f"parse-{job.kind}") as run:
+                job.run = run
+                # The layout is recognised here, off the script thread
+                result = parse(route(data, job.kind), data, job._progress)
+            self.cache.set(job.job_id, result)
+        except Exception as e:
+            job._finish(error=e)
+        else:
+            job._finish()
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Process-wide JobQueue, sized by REPORT_JOB_WORKERS (default: CPU count).
+    REPORT_MAX_JOBS finished jobs are kept, enough for a quarter of Single
+    Origin reports uploaded at once; they hold no results, so this costs
+    little memory.
+    """
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(
+                workers=int(os.getenv("REPORT_JOB_WORKERS", 0)) or None,
+                max_jobs=int(os.getenv("REPORT_MAX_JOBS", 1024)),
+            )
+        return _default_queue
@@ -0,0 +1,492 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from io import BytesIO
+from operator import attrgetter
+from typing import NamedTuple, Optional
+
+import pdfplumber
+import pandas as pd
+
+from .cache import content_hash, get_default_cache
+from .compat import tomllib
+from .profiling import span
+from .topk import top_k_by_category
+
+
+# Known pastry products
+pastry_keywords = [
+    "Almond Croissant", "Apricot Croissant", "Vegan Raspberry Croissant",
+    "Pain Au Chocolat", "Pain Au Raisin", "Cinnamon Swirl", "Butter Croissant"
+]
+PASTRY_PATTERN = re.compile("|".join(re.escape(name.lower()) for name in pastry_keywords))
+
+# Items matching no category rule
+DEFAULT_CATEGORY = "products"
+
+# Reports shorter than this are parsed in-process; pool start-up and
+# re-opening the PDF in every worker would cost more than it saves.
+PARALLEL_MIN_PAGES = int(os.getenv("REPORT_PARALLEL_MIN_PAGES", 8))
+
+# Share of the first page, from the top, read when recognising a layout
+HEADER_FRACTION = float(os.getenv("REPORT_HEADER_FRACTION", 0.15))
+
+
+class WasteLayout(NamedTuple):
+    """
+    One version of the 4 Weekly Food Sales layout. title and header are its
+    signature: every phrase in the PDF metadata title, or in the top strip
+    of the first page. Column numbers are 0-based table columns.
+    """
+    title: tuple = ("Food Sales",)
+    header: tuple = ("Store Name",)
+    store_label: str = "Store Name:"
+    date_marker: str = "Last 4 Weeks"
+    item: int = 0
+    sold: int = 9
+    waste: int = 10
+
+
+class SingleOriginLayout(NamedTuple):
+    """
+    One version of the Single Origin Espresso Sales layout: signature as for
+    WasteLayout, then where the store name and staff rows sit in each
+    page's table. Staff rows have at least min_columns cells; negative
+    columns count from the right.
+    """
+    title: tuple = ("Single Origin",)
+    header: tuple = ("Single Origin",)
+    store_row: int = 2
+    store_col: int = 1
+    first_row: int = 3
+    min_columns: int = 6
+    name: int = 1
+    previous_week: int = -3
+    mix_pct: int = -1
+
+
+WASTE_LAYOUT = WasteLayout()
+SINGLE_ORIGIN_LAYOUT = SingleOriginLayout()
+
+
+class ReportRejected(ValueError):
+    """The PDF is not the report it was parsed as; parsing it again gives the same answer."""
+
+
+class WasteReport(NamedTuple):
+    """Cleaned result of parsing a 4 Weekly Food Sales PDF."""
+    df: pd.DataFrame
+    store_name: Optional[str]
+    date_range: list
+
+
+class SingleOriginReport(NamedTuple):
+    """Cleaned result of parsing a Single Origin Espresso Sales Report PDF."""
+    df: pd.DataFrame
+    store_name: Optional[str]
+    title: str
+    date: str
+
+
+# --- Worker pool ---
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def default_workers():
+    """Worker count from REPORT_WORKERS, defaulting to the number of CPUs."""
+    return int(os.getenv("REPORT_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def get_executor(workers=None):
+    """
+    Process pool shared by every parse in this process, created on first use
+    so its start-up cost is paid once rather than per upload. Workers are
+    spawned, not forked, because the Streamlit server is multi-threaded.
+    A pool broken by a worker dying (e.g. out of memory) is replaced; the
+    parses that were running on it fail with BrokenProcessPool.
+    """
+    global _executor, _executor_workers
+    workers = workers or default_workers()
+    with _executor_lock:
+        # _broken is set once any worker exits abruptly; the pool then refuses all new work
+        if _executor is None or _executor_workers != workers or _executor._broken:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def _page_ranges(page_count, workers):
+    """Split page indices into contiguous chunks, a couple per worker for balance."""
+    chunks = max(1, min(page_count, workers * 2))
+    size = -(-page_count // chunks)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _scan_page_range(scan_page, pdf_bytes, start, stop, progress=None, page_count=None):
+    """
+    Open the PDF and scan pages [start, stop). Runs inside pool workers,
+    where progress is not available; in-process it is called after each page.
+    """
+    results = []
+    with span("pdf.open"):
+        pdf = pdfplumber.open(BytesIO(pdf_bytes), pages=list(range(start + 1, stop + 1)))
+    with pdf:
+        for page in pdf.pages:
+            results.append(scan_page(page, page.page_number - 1))
+            # Drop the parsed layout objects so memory stays flat on long reports
+            page.close()
+            if progress:
+                progress(page.page_number, page_count)
+    return results
+
+
+def scan_pages(pdf_bytes, scan_page, workers=None, progress=None, min_pages=None):
+    """
+    Apply scan_page(page, page_num) to every page and return the results in
+    page order. Reports of at least min_pages (default PARALLEL_MIN_PAGES)
+    are fanned out across the process pool; smaller ones, or workers=1, are
+    scanned serially. progress(pages_done, page_count) is called as pages
+    (or, in the pool, chunks of pages) finish.
+    """
+    workers = workers or default_workers()
+    min_pages = min_pages or PARALLEL_MIN_PAGES
+    with span("pdf.open"), pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        page_count = len(pdf.pages)
+    if progress:
+        progress(0, page_count)
+
+    if workers <= 1 or page_count < min_pages:
+        return _scan_page_range(scan_page, pdf_bytes, 0, page_count, progress, page_count)
+
+    with span("pages.parallel_scan"):
+        executor = get_executor(workers)
+        ranges = _page_ranges(page_count, workers)
+        futures = {
+            executor.submit(_scan_page_range, scan_page, pdf_bytes, start, stop): i
+            for i, (start, stop) in enumerate(ranges)
+        }
+        chunks = [None] * len(ranges)
+        done = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            chunks[i] = future.result()
+            done += ranges[i][1] - ranges[i][0]
+            if progress:
+                progress(done, page_count)
+    return [result for chunk in chunks for result in chunk]
+
+
+# --- Layout signatures ---
+def page_header_text(page, fraction=None):
+    """Text of the top strip of a page only, cropped before words are grouped into lines."""
+    with span("page.header_text"):
+        top = page.crop((0, 0, page.width, page.height * (fraction or HEADER_FRACTION)))
+        return top.extract_text() or ""
+
+
+def matches_signature(layout, title, header):
+    """Whether a PDF with this metadata title and first-page header text has the layout."""
+    title, header = title.lower(), header.lower()
+    return any(
+        phrases and all(phrase.lower() in text for phrase in phrases)
+        for phrases, text in ((layout.title, title), (layout.header, header))
+    )
+
+
+# --- Categories ---
+def load_category_rules(path=None):
+    """
+    Ordered (category, pattern) rules matched against lower-cased item
+    names; the first match wins and anything else is DEFAULT_CATEGORY.
+    REPORT_CATEGORIES may name a TOML file with a [categories] table of
+    name = ["keyword", ...]; by default only pastries are split out.
+    """
+    path = path or os.getenv("REPORT_CATEGORIES")
+    if not path:
+        return [("pastries", PASTRY_PATTERN)]
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    categories = tomllib.loads(text).get("categories", {})
+    return [
+        (name, re.compile("|".join(re.escape(keyword.lower()) for keyword in keywords)))
+        for name, keywords in categories.items() if keywords
+    ]
+
+
+CATEGORY_RULES = load_category_rules()
+
+
+def category_names(rules=None):
+    """Every category a report can contain, DEFAULT_CATEGORY first."""
+    return [DEFAULT_CATEGORY] + [name for name, _ in (rules or CATEGORY_RULES)]
+
+
+def waste_namespace(rules=None):
+    # Cached frames carry their categories, so changing the rules must not reuse them
+    signature = repr([(name, pattern.pattern) for name, pattern in (rules or CATEGORY_RULES)])
+    return f"waste-{hashlib.sha256(signature.encode()).hexdigest()[:12]}"
+
+
+def categorise(items, rules=None):
+    """Category of every item name in a Series, by the first matching rule."""
+    lower = items.str.lower()
+    categories = pd.Series(DEFAULT_CATEGORY, index=items.index, dtype=object)
+    for name, pattern in reversed(rules or CATEGORY_RULES):
+        categories[lower.str.contains(pattern)] = name
+    return categories
+
+
+# --- Waste report ---
+def _clean_date_range(raw_date):
+    """Turn the "Last 4 Weeks" header cells into [latest, earliest]."""
+    if not raw_date:
+        return ["Unknown", "Unknown"]
+    raw_date = list(raw_date)
+    raw_date.pop()
+    if len(raw_date) < 2:
+        return ["Unknown", "Unknown"]
+    return [raw_date[0], raw_date[-1]]
+
+
+def _column(rows, index):
+    """One column of ragged table rows, padded with None like pd.DataFrame does."""
+    return [row[index] if len(row) > index else None for row in rows]
+
+
+def waste_row_mask(first_cells):
+    """
+    Boolean mask of the item rows given the first cell of every raw table
+    row, computed column-wise: drop empty cells, ALL-CAPS section headers
+    and cells without letters. The old all-numeric-row check is implied,
+    since a first cell with a letter is never numeric.
+    """
+    first = first_cells.fillna("").astype(str).str.strip()
+    has_alpha = first.str.contains(r"[a-zA-Z]", regex=True)
+    return has_alpha & ~first.str.isupper()
+
+
+def build_waste_dataframe(raw_rows, rules=None, layout=WASTE_LAYOUT):
+    """
+    Build the Item/Category/is_pastry/Sold/Waste/Waste_pct frame from raw
+    table rows. Only the three columns the report uses (the layout's item,
+    sold and waste columns) are materialised.
+    """
+    with span("rows.clean"):
+        df = pd.DataFrame({
+            "col1": _column(raw_rows, layout.item),
+            "col10": _column(raw_rows, layout.sold),
+            "col11": _column(raw_rows, layout.waste),
+        })
+        df = df[waste_row_mask(df["col1"])].copy()
+
+    with span("dataframe.build"):
+        df["Item"] = df["col1"].str.replace(r"\s+", " ", regex=True).str.strip()
+        df["Category"] = categorise(df["Item"], rules)
+        df["is_pastry"] = df["Category"] == "pastries"
+
+        df[["col10", "col11"]] = df[["col10", "col11"]].apply(pd.to_numeric, errors="coerce")
+        df = df.rename(columns={"col10": "Sold", "col11": "Waste"})
+        df = df[["Item", "Category", "is_pastry", "Sold", "Waste"]].dropna(subset=["Sold", "Waste"])
+        df["Waste_pct"] = (df["Waste"] / (df["Sold"] + df["Waste"]) * 100).round(2)
+    return df
+
+
+def _scan_waste_page(page, page_num, layout=WASTE_LAYOUT):
+    """
+    Extract one page's tables exactly once and return
+    (raw_rows, store_name, raw_date). Text is only read on the first page,
+    which is the only one carrying the store label. Row filtering is left
+    to build_waste_dataframe, which does it for the whole report.
+    """
+    raw_rows = []
+    store_name = raw_date = None
+
+    if page_num == 0:
+        with span("page.extract_text"):
+            text = page.extract_text()
+        store_match = re.search(re.escape(layout.store_label) + r"\s*(.*)", text or "")
+        if store_match:
+            store_name = store_match.group(1).strip()
+
+    with span("page.extract_tables"):
+        tables = page.extract_tables()
+    for table in tables:
+        for i, row in enumerate(table):
+            if page_num == 0 and i == 0 and layout.date_marker in row:
+                raw_date = [date for date in row if date]
+            if row and len(row) > layout.item and row[layout.item]:
+                raw_rows.append(row)
+
+    return raw_rows, store_name, raw_date
+
+
+def parse_waste_report(pdf_bytes, workers=None, progress=None, min_pages=None, layout=WASTE_LAYOUT):
+    """
+    Extract the cleaned waste data, store name and date range from the raw
+    bytes of a 4 Weekly Food Sales PDF. Always goes to pdfplumber; callers
+    go through formats.parse_reports_cached() or the job queue, which
+    route the upload and cache the result. progress and min_pages are
+    passed on to scan_pages().
+    """
+    raw_rows = []
+    store_name = None
+    raw_date = None
+
+    scan_page = partial(_scan_waste_page, layout=layout)
+    for rows, page_store, page_date in scan_pages(pdf_bytes, scan_page, workers, progress, min_pages):
+        raw_rows.extend(rows)
+        store_name = store_name or page_store
+        raw_date = raw_date or page_date
+
+    df = build_waste_dataframe(raw_rows, layout=layout) if raw_rows else pd.DataFrame()
+    return WasteReport(df, store_name, _clean_date_range(raw_date))
+
+
+def parse_waste_top_k(pdf_bytes, k=10, layout=WASTE_LAYOUT):
+    """
+    parse_waste_report() for callers that only chart the report: the df
+    holds just the top k rows of each category by Waste_pct, in the same
+    order top_wasted() picks them. Pages are read one at a time and their
+    rows streamed through a bounded heap per category, so memory is one
+    page plus k rows per category however long the report; the full frame
+    is never built. Each page is cleaned by build_waste_dataframe(), so the
+    rows kept are exactly the ones parse_waste_report() would give.
+    """
+    header = {"store_name": None, "raw_date": None, "dtypes": None}
+
+    def rows():
+        with span("pdf.open"):
+            pdf = pdfplumber.open(BytesIO(pdf_bytes))
+        with pdf:
+            for page in pdf.pages:
+                raw_rows, page_store, page_date = _scan_waste_page(page, page.page_number - 1, layout)
+                page.close()
+                header["store_name"] = header["store_name"] or page_store
+                header["raw_date"] = header["raw_date"] or page_date
+                if raw_rows:
+                    page_df = build_waste_dataframe(raw_rows, layout=layout)
+                    header["dtypes"] = page_df.dtypes
+                    yield from page_df.itertuples(index=False)
+
+    with span("top10.stream"):
+        tops = top_k_by_category(rows(), k, key=attrgetter("Waste_pct"), category=attrgetter("Category"))
+    top_rows = [row for top in tops.values() for row in top]
+    df = pd.DataFrame(top_rows).astype(header["dtypes"]) if top_rows else pd.DataFrame()
+    return WasteReport(df, header["store_name"], _clean_date_range(header["raw_date"]))
+
+
+def parse_many(namespace, parse_fn, pdf_bytes_list, workers=None, return_exceptions=False):
+    """
+    Parse several uploads at once, one file per pool worker, and return the
+    results in upload order. Files already in the report cache are not
+    re-parsed. parse_fn must be a module-level function so it can be
+    sent to the workers. With return_exceptions=True a file that fails to
+    parse yields its exception in place of a result instead of aborting
+    the whole batch.
+    """
+    cache = get_default_cache()
+    keys = [f"{namespace}-{content_hash(data)}" for data in pdf_bytes_list]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    workers = workers or default_workers()
+    futures = {}
+    if len(missing) > 1 and workers > 1:
+        executor = get_executor(workers)
+        futures = {i: executor.submit(parse_fn, pdf_bytes_list[i]) for i in missing}
+
+    for i in missing:
+        try:
+            results[i] = futures[i].result() if futures else parse_fn(pdf_bytes_list[i])
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results[i] = e
+        else:
+            cache.set(keys[i], results[i])
+    return results
+
+
+# --- Single Origin report ---
+def build_single_origin_dataframe(rows_cleaned):
+    """Build the Name/Previous Week/Mix % Last/Improvement frame from staff rows."""
+    df = pd.DataFrame(rows_cleaned, columns=["Name", "Previous Week", "Mix % Last"])
+    df = df[~df["Name"].str.contains(r"Cashier|Barista|Shift", case=False, na=False)]
+    df["Name"] = df["Name"].str.strip()
+    # Convert and replace NaN with 0
+    df["Mix % Last"] = pd.to_numeric(df["Mix % Last"].str.replace('%', ''), errors="coerce").fillna(0)
+    df["Previous Week"] = pd.to_numeric(df["Previous Week"].str.replace('%',''), errors="coerce").fillna(0)
+    df["Improvement"] = df["Mix % Last"] - df["Previous Week"]
+    return df
+
+
+def _single_origin_staff_rows(table, first_page, layout=SINGLE_ORIGIN_LAYOUT):
+    """(name, previous week, mix %) rows of one page's table, and the store name on the first page."""
+    rows = []
+    store_name = None
+    for i, row in enumerate(table):
+        if not row or (len(row) < 2) or (row[0] is None and row[1] is None):
+            continue
+
+        if first_page and i == layout.store_row and len(row) > layout.store_col and row[layout.store_col]:
+            store_name = row[layout.store_col].strip()
+
+        if (i >= layout.first_row or not first_page) and len(row) >= layout.min_columns:
+            name = row[layout.name].strip() if row[layout.name] else None
+            p_week = row[layout.previous_week].strip() if row[layout.previous_week] else None
+            mix_pct = row[layout.mix_pct].strip() if row[layout.mix_pct] else None
+            # Later pages repeat the column headings above the staff rows
+            if name and mix_pct and "mix" not in mix_pct.lower():
+                rows.append((name, p_week, mix_pct))
+    return rows, store_name
+
+
+def parse_single_origin_report(pdf_bytes, progress=None, layout=SINGLE_ORIGIN_LAYOUT):
+    """
+    Extract the staff Mix % table, store name, title and date from a Single
+    Origin Espresso Sales Report. Raises ReportRejected for any other PDF. The
+    staff table is read from every page; progress(pages_done, page_count)
+    is called after each one.
+    """
+    rows_cleaned = []
+
+    with span("pdf.open"):
+        pdf = pdfplumber.open(BytesIO(pdf_bytes))
+    with pdf:
+        title = (pdf.metadata.get("Title") or "").strip()
+        page_count = len(pdf.pages)
+        first_page = pdf.pages[0]
+        with span("page.extract_text"):
+            text = first_page.extract_text() or ""
+        if not matches_signature(layout, title, text):
+            raise ReportRejected("This PDF does not appear to be a Single Origin report.")
+
+        for page in pdf.pages:
+            with span("page.extract_tables"):
+                table = page.extract_table() or []
+            rows, page_store = _single_origin_staff_rows(table, page.page_number == 1, layout)
+            rows_cleaned.extend(rows)
+            if page.page_number == 1:
+                store_name = page_store
+            page.close()
+            if progress:
+                progress(page.page_number, page_count)
+
+    date = text.split("\n")[0]
+    date = '-'.join(date.split()[-4:-1])
+    if not date:
+        date = "Unknown Date"
+
+    with span("dataframe.build"):
+        df = build_single_origin_dataframe(rows_cleaned)
+    return SingleOriginReport(df, store_name, title or "Single Origin", date)
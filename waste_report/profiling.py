@@ -0,0 +1,196 @@
+"""
+Opt-in timing of the report pipeline.
+
+With REPORT_PROFILE=1 every span() records wall time, CPU time and, when
+REPORT_PROFILE_MEMORY=1 as well, the tracemalloc peak above the memory in
+use when the span started. Spans belong to the run started on the current
+thread; each finished run is logged as one JSON line on the
+"waste_report.profiling" logger, and REPORT_PROFILE_DUMP=<dir> also writes
+a cProfile dump per run (on Python 3.12+, which allows one profiler per
+process, only for runs started while no other is profiled). Disabled,
+span() is a flag check returning a shared no-op context manager.
+
+Spans inside process-pool workers are not collected; the parent records
+the whole fan-out as one span.
+"""
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("REPORT_PROFILE", "") not in ("", "0")
+TRACE_MEMORY = os.getenv("REPORT_PROFILE_MEMORY", "") not in ("", "0")
+DUMP_DIR = os.getenv("REPORT_PROFILE_DUMP") or None
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()
+
+
+def enable(flag=True, memory=None, dump_dir=None):
+    """Switch profiling on or off at runtime (e.g. from a benchmark)."""
+    global ENABLED, TRACE_MEMORY, DUMP_DIR
+    ENABLED = flag
+    if memory is not None:
+        TRACE_MEMORY = memory
+    if dump_dir is not None:
+        DUMP_DIR = dump_dir
+
+
+class Span:
+    __slots__ = ("name", "depth", "wall", "cpu", "peak", "_wall0", "_cpu0", "_mem0", "_peak_seen")
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.wall = self.cpu = 0.0
+        self.peak = None
+        self._peak_seen = 0
+
+
+class Run:
+    """Spans recorded on one thread between start_run() and finish_run()."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.wall = self.cpu = 0.0
+        self.trace_memory = TRACE_MEMORY
+        self._stack = []
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        self.profiler = None
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if DUMP_DIR:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one profiler per process, so concurrent runs go without a dump
+                logger.debug("Another run is being profiled; no cProfile dump for %s", name)
+            else:
+                self.profiler = profiler
+
+    @contextlib.contextmanager
+    def span(self, name):
+        span = Span(name, len(self._stack))
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent._peak_seen = max(parent._peak_seen, peak)
+            tracemalloc.reset_peak()
+            span._mem0 = current
+        self.spans.append(span)
+        self._stack.append(span)
+        span._wall0 = time.perf_counter()
+        span._cpu0 = time.thread_time()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - span._wall0
+            span.cpu = time.thread_time() - span._cpu0
+            self._stack.pop()
+            if self.trace_memory:
+                peak = max(span._peak_seen, tracemalloc.get_traced_memory()[1])
+                span.peak = peak - span._mem0
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent._peak_seen = max(parent._peak_seen, peak)
+
+    def finish(self):
+        self.wall = time.perf_counter() - self._wall0
+        self.cpu = time.thread_time() - self._cpu0
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def summary(self):
+        """One row per stage name, in first-seen order, with totals across repeats."""
+        return summarise(self.spans)
+
+    def to_json(self):
+        return json.dumps({
+            "run": self.name,
+            "wall_ms": round(self.wall * 1000, 2),
+            "cpu_ms": round(self.cpu * 1000, 2),
+            "stages": self.summary(),
+        })
+
+
+def summarise(spans):
+    """Run.summary() over any spans, e.g. those of several runs together."""
+    stages = {}
+    for span in spans:
+        row = stages.setdefault(span.name, {
+            "stage": span.name, "calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_kb": None,
+        })
+        row["calls"] += 1
+        row["wall_ms"] += span.wall * 1000
+        row["cpu_ms"] += span.cpu * 1000
+        if span.peak is not None:
+            row["peak_kb"] = max(row["peak_kb"] or 0, span.peak / 1024)
+    for row in stages.values():
+        row["wall_ms"] = round(row["wall_ms"], 2)
+        row["cpu_ms"] = round(row["cpu_ms"], 2)
+        if row["peak_kb"] is not None:
+            row["peak_kb"] = round(row["peak_kb"], 1)
+    return list(stages.values())
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def start_run(name):
+    """Start collecting spans on this thread. Returns the Run, or None when disabled."""
+    if not ENABLED:
+        return None
+    previous = current_run()
+    if previous is not None and previous.profiler is not None:
+        # Left behind by a script that stopped early
+        previous.profiler.disable()
+    _local.run = Run(name)
+    return _local.run
+
+
+def finish_run(run, log=True):
+    """Stop a run, log its JSON line and write the cProfile dump if configured."""
+    if run is None:
+        return None
+    run.finish()
+    if current_run() is run:
+        _local.run = None
+    if log:
+        if not logger.handlers and not logging.getLogger().handlers:
+            logger.addHandler(logging.StreamHandler())
+            logger.setLevel(logging.INFO)
+        logger.info(run.to_json())
+    if run.profiler is not None:
+        os.makedirs(DUMP_DIR, exist_ok=True)
+        run.profiler.dump_stats(os.path.join(DUMP_DIR, f"{run.name}-{time.strftime('%Y%m%d-%H%M%S')}-{id(run):x}.prof"))
+    return run
+
+
+@contextlib.contextmanager
+def profiled_run(name):
+    run = start_run(name)
+    try:
+        yield run
+    finally:
+        finish_run(run)
+
+
+def span(name):
+    """Time a stage of the current run; a no-op when profiling is off or no run is active."""
+    if not ENABLED:
+        return _NOOP
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NOOP
+    return run.span(name)
@@ -0,0 +1,97 @@
+"""
+Compact typed frames for many parsed reports at once.
+
+A single report's frame is small; the memory goes on batches (every store,
+every week) held side by side as object columns and float64s. These helpers
+build one long frame keyed by Store and Week instead, with names stored as
+category codes and numbers as int32/float32, filling preallocated arrays rather
+than concatenating per-report frames.
+"""
+import numpy as np
+import pandas as pd
+
+WASTE_COLUMNS = ["Store", "Week", "Item", "Category", "Sold", "Waste", "Waste_pct"]
+SINGLE_ORIGIN_COLUMNS = ["Store", "Week", "Name", "Previous Week", "Mix % Last", "Improvement"]
+
+
+def to_week(label):
+    """ISO date (YYYY-MM-DD) for a report date label, or None if unparseable."""
+    if not label or label.startswith("Unknown"):
+        return None
+    parsed = pd.to_datetime(label, dayfirst=True, errors="coerce")
+    return None if pd.isna(parsed) else parsed.date().isoformat()
+
+
+def _key_columns(stores, weeks, lengths):
+    """Store (category) and Week (datetime) columns repeating one key per report."""
+    store_codes, store_names = pd.factorize(pd.Series(stores, dtype=object).fillna("Unknown"))
+    week_values = pd.to_datetime(pd.Series(weeks, dtype=object), errors="coerce").to_numpy()
+    return (
+        pd.Categorical.from_codes(np.repeat(store_codes, lengths), categories=store_names),
+        np.repeat(week_values, lengths),
+    )
+
+
+def _fill(frames, column, total):
+    """
+    One column of every frame copied into a single preallocated array:
+    int32 when every frame holds whole numbers, float32 otherwise.
+    """
+    integer = bool(frames) and all(pd.api.types.is_integer_dtype(df[column]) for df in frames)
+    dtype = np.int32 if integer else np.float32
+    out = np.empty(total, dtype=dtype)
+    start = 0
+    for df in frames:
+        out[start:start + len(df)] = df[column].to_numpy(dtype=dtype) if integer else df[column].to_numpy(dtype=dtype, na_value=np.nan)
+        start += len(df)
+    return out
+
+
+def _names(frames, column):
+    """A shared categorical over the names in every frame."""
+    values = np.concatenate([df[column].to_numpy(dtype=object) for df in frames]) if frames else np.array([], dtype=object)
+    return pd.Categorical(values)
+
+
+def waste_frame(reports):
+    """Every WasteReport as one typed frame with WASTE_COLUMNS, in report order."""
+    frames = [report.df for report in reports]
+    lengths = [len(df) for df in frames]
+    total = sum(lengths)
+    store, week = _key_columns(
+        [report.store_name for report in reports], [to_week(report.date_range[0]) for report in reports], lengths
+    )
+    return pd.DataFrame({
+        "Store": store,
+        "Week": week,
+        "Item": _names(frames, "Item"),
+        "Category": _names(frames, "Category"),
+        "Sold": _fill(frames, "Sold", total),
+        "Waste": _fill(frames, "Waste", total),
+        "Waste_pct": _fill(frames, "Waste_pct", total),
+    })
+
+
+def single_origin_frame(reports):
+    """Every SingleOriginReport as one typed frame with SINGLE_ORIGIN_COLUMNS, in report order."""
+    frames = [report.df for report in reports]
+    lengths = [len(df) for df in frames]
+    total = sum(lengths)
+    store, week = _key_columns(
+        [report.store_name for report in reports], [to_week(report.date) for report in reports], lengths
+    )
+    return pd.DataFrame({
+        "Store": store,
+        "Week": week,
+        "Name": _names(frames, "Name"),
+        "Previous Week": _fill(frames, "Previous Week", total),
+        "Mix % Last": _fill(frames, "Mix % Last", total),
+        "Improvement": _fill(frames, "Improvement", total),
+    })
+
+
+def memory_bytes(frames):
+    """Deep memory use of one frame or a list of frames."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    return int(sum(df.memory_usage(deep=True).sum() for df in frames))
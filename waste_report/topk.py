@@ -0,0 +1,53 @@
+"""
+Bounded top-k selection for streamed rows: memory stays O(k) per category
+however many rows go through, instead of building and sorting a frame.
+"""
+import heapq
+import itertools
+
+
+class TopK:
+    """The k items with the largest key seen so far. Ties keep the earliest item; NaN keys are skipped."""
+
+    def __init__(self, k, key):
+        self.k = k
+        self.key = key
+        self._heap = []
+        self._seen = itertools.count()
+
+    def push(self, item):
+        value = self.key(item)
+        if value != value or self.k <= 0:
+            return
+        # Earlier items get the larger tie-breaker, so they win ties
+        entry = (value, -next(self._seen), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """Kept items, largest key first."""
+        return [item for *_, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def top_k(rows, k, key):
+    """The k rows with the largest key, largest first."""
+    top = TopK(k, key)
+    for row in rows:
+        top.push(row)
+    return top.items()
+
+
+def top_k_by_category(rows, k, key, category):
+    """{category: top k rows} in the order categories are first seen."""
+    tops = {}
+    for row in rows:
+        name = category(row)
+        if name not in tops:
+            tops[name] = TopK(k, key)
+        tops[name].push(row)
+    return {name: top.items() for name, top in tops.items()}